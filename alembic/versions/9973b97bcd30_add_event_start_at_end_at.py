@@ -0,0 +1,93 @@
+"""add event start_at end_at
+
+Revision ID: 9973b97bcd30
+Revises: 6722a70050c0
+Create Date: 2026-10-17 09:12:44.301518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, time
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9973b97bcd30'
+down_revision: Union[str, Sequence[str], None] = '6722a70050c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Bản chụp bảng tiết học + mốc mặc định tại thời điểm viết migration (utils/constants.py).
+# Không import code đang chạy: sửa bảng tiết về sau không được làm đổi kết quả của migration cũ.
+PERIOD_START_TIMES = {
+    1: (7, 0), 2: (7, 30), 3: (8, 0), 4: (8, 30), 5: (9, 0), 6: (9, 30),
+    7: (10, 0), 8: (10, 30), 9: (11, 0), 10: (11, 30),
+    11: (13, 0), 12: (13, 30), 13: (14, 0), 14: (14, 30), 15: (15, 0), 16: (15, 30),
+    17: (16, 0), 18: (16, 30), 19: (17, 0), 20: (17, 30),
+    21: (18, 0), 22: (18, 30), 23: (19, 0), 24: (19, 30), 25: (20, 0), 26: (20, 30),
+}
+PERIOD_END_TIMES = {
+    1: (7, 30), 2: (8, 0), 3: (8, 30), 4: (9, 0), 5: (9, 30), 6: (10, 0),
+    7: (10, 30), 8: (11, 0), 9: (11, 30), 10: (12, 0),
+    11: (13, 30), 12: (14, 0), 13: (14, 30), 14: (15, 0), 15: (15, 30), 16: (16, 0),
+    17: (16, 30), 18: (17, 0), 19: (17, 30), 20: (18, 0),
+    21: (18, 30), 22: (19, 0), 23: (19, 30), 24: (20, 0), 25: (20, 30), 26: (21, 0),
+}
+DEFAULT_START_TIME = (7, 0)
+DEFAULT_END_TIME = (23, 59)
+
+
+def get_event_times(event_day, start_period, end_period):
+    sh, sm = PERIOD_START_TIMES.get(start_period, DEFAULT_START_TIME)
+    eh, em = PERIOD_END_TIMES.get(end_period, DEFAULT_END_TIME)
+    return datetime.combine(event_day, time(sh, sm)), datetime.combine(event_day, time(eh, em))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('start_at', sa.DateTime(), nullable=True))
+    op.add_column('events', sa.Column('end_at', sa.DateTime(), nullable=True))
+
+    # Backfill: tính lại thời điểm tuyệt đối từ day_start + tiết học cho dữ liệu cũ
+    conn = op.get_bind()
+    events = sa.table(
+        'events',
+        sa.column('event_id', sa.Integer),
+        sa.column('day_start', sa.Date),
+        sa.column('start_period', sa.Integer),
+        sa.column('end_period', sa.Integer),
+        sa.column('start_at', sa.DateTime),
+        sa.column('end_at', sa.DateTime),
+    )
+    rows = conn.execute(
+        sa.select(events.c.event_id, events.c.day_start, events.c.start_period, events.c.end_period)
+    ).all()
+
+    update_stmt = (
+        events.update()
+        .where(events.c.event_id == sa.bindparam('b_event_id'))
+        .values(start_at=sa.bindparam('b_start_at'), end_at=sa.bindparam('b_end_at'))
+    )
+    params = []
+    for event_id, day_start, start_period, end_period in rows:
+        start_at, end_at = get_event_times(day_start, start_period, end_period)
+        params.append({'b_event_id': event_id, 'b_start_at': start_at, 'b_end_at': end_at})
+        if len(params) >= BATCH_SIZE:
+            conn.execute(update_stmt, params)
+            params = []
+    if params:
+        conn.execute(update_stmt, params)
+
+    op.create_index(op.f('ix_events_start_at'), 'events', ['start_at'], unique=False)
+    op.create_index(op.f('ix_events_end_at'), 'events', ['end_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_events_end_at'), table_name='events')
+    op.drop_index(op.f('ix_events_start_at'), table_name='events')
+    op.drop_column('events', 'end_at')
+    op.drop_column('events', 'start_at')
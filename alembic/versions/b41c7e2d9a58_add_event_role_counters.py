@@ -0,0 +1,45 @@
+"""add event role counters
+
+Revision ID: b41c7e2d9a58
+Revises: 9973b97bcd30
+Create Date: 2026-10-17 11:05:18.402917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41c7e2d9a58'
+down_revision: Union[str, Sequence[str], None] = '9973b97bcd30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('instructor_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('events', sa.Column('teaching_assistant_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill: đếm lại người tham gia theo vai trò (kể cả các biến thể role cũ)
+    op.execute("""
+        UPDATE events SET
+            instructor_count = (
+                SELECT count(*) FROM user_event
+                WHERE user_event.event_id = events.event_id
+                  AND lower(user_event.role) IN ('instructor', 'gv', 'giang_vien')
+            ),
+            teaching_assistant_count = (
+                SELECT count(*) FROM user_event
+                WHERE user_event.event_id = events.event_id
+                  AND lower(user_event.role) IN ('teaching_assistant', 'ta', 'tro_giang')
+            )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'teaching_assistant_count')
+    op.drop_column('events', 'instructor_count')
@@ -0,0 +1,89 @@
+"""add user search_text
+
+Revision ID: c7d2e5a1f390
+Revises: f4c2a9d61e57
+Create Date: 2026-10-17 14:20:37.118204
+
+"""
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e5a1f390'
+down_revision: Union[str, Sequence[str], None] = 'f4c2a9d61e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Bản sao cố định của utils/text_utils.py tại revision này: migration không được phụ thuộc code hiện hành,
+# nếu sau này đổi cách bỏ dấu thì backfill cũ vẫn chạy ra đúng dữ liệu như lúc viết migration.
+_SPACES = re.compile(r"\s+")
+
+
+def fold_text(value):
+    if not value:
+        return ""
+    value = value.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SPACES.sub(" ", stripped).strip().lower()
+
+
+def build_user_search_text(full_name, email, phone):
+    return " ".join(part for part in (fold_text(full_name), fold_text(email), fold_text(phone)) if part)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('search_text', sa.String(), nullable=True))
+
+    # Backfill: bỏ dấu họ tên + email + SĐT cho user cũ (làm bằng Python để khớp với listener của model)
+    conn = op.get_bind()
+    users = sa.table(
+        'users',
+        sa.column('user_id', sa.Integer),
+        sa.column('full_name', sa.String),
+        sa.column('email', sa.String),
+        sa.column('phone', sa.String),
+        sa.column('search_text', sa.String),
+    )
+    rows = conn.execute(
+        sa.select(users.c.user_id, users.c.full_name, users.c.email, users.c.phone)
+    ).all()
+
+    update_stmt = (
+        users.update()
+        .where(users.c.user_id == sa.bindparam('b_user_id'))
+        .values(search_text=sa.bindparam('b_search_text'))
+    )
+    params = []
+    for user_id, full_name, email, phone in rows:
+        params.append({'b_user_id': user_id, 'b_search_text': build_user_search_text(full_name, email, phone)})
+        if len(params) >= BATCH_SIZE:
+            conn.execute(update_stmt, params)
+            params = []
+    if params:
+        conn.execute(update_stmt, params)
+
+    # Phiên bản dữ liệu tìm kiếm: index trong bộ nhớ của từng worker SQLite so với dòng này để biết khi nào xây lại
+    data_versions = sa.table('data_versions', sa.column('name', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(data_versions, [{'name': 'users', 'version': 0}])
+
+    # Index trigram chỉ có trên Postgres; SQLite dùng index trong bộ nhớ (helpers/user_search.py)
+    if conn.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_users_search_text_trgm ON users USING gin (search_text gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM data_versions WHERE name = 'users'")
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_users_search_text_trgm')
+    op.drop_column('users', 'search_text')
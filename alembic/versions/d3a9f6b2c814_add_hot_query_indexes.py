@@ -0,0 +1,75 @@
+"""add hot query indexes
+
+Revision ID: d3a9f6b2c814
+Revises: c7d2e5a1f390
+Create Date: 2026-10-17 15:20:41.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9f6b2c814'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e5a1f390'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENT_ACTIVE = "status <> 'deleted'"
+
+# (tên index, bảng, cột, điều kiện index một phần theo dialect)
+INDEXES = [
+    ('ix_events_active_start_at', 'events', ['start_at', 'event_id'],
+     {'postgresql': EVENT_ACTIVE, 'sqlite': EVENT_ACTIVE}),
+    ('ix_events_active_end_at', 'events', ['end_at', 'event_id'],
+     {'postgresql': EVENT_ACTIVE, 'sqlite': EVENT_ACTIVE}),
+    ('ix_events_active_day_start', 'events', ['day_start'],
+     {'postgresql': EVENT_ACTIVE, 'sqlite': EVENT_ACTIVE}),
+    ('ix_user_event_event_id_role', 'user_event', ['event_id', 'role'], {}),
+    ('ix_user_event_user_id', 'user_event', ['user_id'], {}),
+    ('ix_users_active_user_id', 'users', ['user_id'],
+     {'postgresql': 'is_deleted = false', 'sqlite': 'is_deleted = 0'}),
+]
+
+
+def _where_kwargs(where: dict) -> dict:
+    return {f'{dialect}_where': sa.text(clause) for dialect, clause in where.items()}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, unique=False, **_where_kwargs(where))
+        return
+
+    # Postgres: CREATE INDEX CONCURRENTLY không khóa ghi bảng nhưng không chạy được trong transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            # Lần chạy trước bị ngắt giữa chừng để lại index INVALID -> xóa đi rồi tạo lại
+            invalid = not op.get_context().as_sql and conn.execute(sa.text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ), {'name': name}).first()
+            if invalid:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+                **_where_kwargs(where),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
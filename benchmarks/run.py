@@ -0,0 +1,173 @@
+"""
+Chạy các kịch bản benchmark và in throughput + p50/p95/p99 cho từng kịch bản.
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --users 5000 --events 800
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --out bench/before.json
+    # ... sửa code ...
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --baseline bench/before.json --fail-on-regression
+
+--baseline so sánh với một file kết quả đã lưu; --fail-on-regression trả exit code 1 nếu p95/p99 tăng
+hoặc throughput giảm quá --tolerance (mặc định 10%).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+SCENARIO_ORDER = ("events_table", "dashboard", "join_leave", "signin_burst", "admin_search", "candidate_modal")
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank: giá trị nhỏ nhất mà >= p% số mẫu không vượt quá."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], errors: int, wall_seconds: float) -> dict:
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "ops": len(values),
+        "errors": errors,
+        "throughput_ops_s": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+async def run_scenario(ctx, scenario, iterations: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await scenario.run(ctx)
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = iterations
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            statuses = await scenario.run(ctx)
+            latencies.append(time.perf_counter() - start)
+            if any(status not in scenario.expected for status in statuses):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_all(names: list[str], iterations: int, concurrency: int, warmup: int, sessions: int, rng_seed: int) -> dict:
+    # Import trễ: DATABASE_URL phải được đặt trước khi database.py tạo engine
+    import main
+    from helpers.limiter import limiter
+    from benchmarks.scenarios import SCENARIOS, build_context
+
+    # Kịch bản signin_burst cố ý đăng nhập liên tục -> tắt rate limit trong process benchmark
+    limiter.enabled = False
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        ctx = await build_context(main.app, sessions=sessions, rng_seed=rng_seed)
+        try:
+            for name in names:
+                results[name] = await run_scenario(ctx, SCENARIOS[name], iterations, concurrency, warmup)
+                print_row(name, results[name])
+        finally:
+            await ctx.aclose()
+    return results
+
+
+def print_header():
+    print(f"{'scenario':<18}{'ops':>6}{'err':>5}{'ops/s':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+
+def print_row(name: str, r: dict):
+    print(f"{name:<18}{r['ops']:>6}{r['errors']:>5}{r['throughput_ops_s']:>9}"
+          f"{r['mean_ms']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+
+
+def _change(new: float, old: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """In bảng chênh lệch so với baseline; trả về danh sách kịch bản bị chậm đi quá tolerance (%)."""
+    regressions = []
+    print(f"\n{'vs baseline':<18}{'ops/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, r in results.items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is None:
+            print(f"{name:<18}{'(mới)':>10}")
+            continue
+        throughput = _change(r["throughput_ops_s"], old["throughput_ops_s"])
+        latency = {key: _change(r[key], old[key]) for key in LATENCY_KEYS}
+        print(f"{name:<18}{throughput:>+9.1f}%" + "".join(f"{latency[key]:>+9.1f}%" for key in LATENCY_KEYS))
+        if throughput < -tolerance or latency["p95_ms"] > tolerance or latency["p99_ms"] > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def describe_environment(args) -> dict:
+    from sqlalchemy.engine import make_url
+    url = os.getenv("DATABASE_URL", "")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": make_url(url).get_backend_name() if url else None,
+        "python": platform.python_version(),
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "sessions": args.sessions,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các luồng chính của app (in-process)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIO_ORDER),
+                        help=f"Danh sách cách nhau bởi dấu phẩy: {', '.join(SCENARIO_ORDER)}")
+    parser.add_argument("--iterations", type=int, default=200, help="Số thao tác đo cho mỗi kịch bản")
+    parser.add_argument("--concurrency", type=int, default=10, help="Số thao tác chạy đồng thời")
+    parser.add_argument("--warmup", type=int, default=10, help="Số thao tác chạy trước, không tính")
+    parser.add_argument("--sessions", type=int, default=20, help="Số user đăng nhập sẵn dùng luân phiên")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Ghi kết quả ra file JSON (làm baseline cho lần sau)")
+    parser.add_argument("--baseline", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Ngưỡng chậm đi (%%) bị coi là regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIO_ORDER))
+    if unknown:
+        parser.error(f"Kịch bản không tồn tại: {', '.join(unknown)}")
+
+    print_header()
+    results = asyncio.run(run_all(names, args.iterations, args.concurrency, args.warmup, args.sessions, args.seed))
+    report = {"meta": describe_environment(args), "scenarios": results}
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nChậm đi quá {args.tolerance}%: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
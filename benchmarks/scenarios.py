@@ -0,0 +1,137 @@
+"""
+Các kịch bản benchmark chạy thẳng vào app ASGI trong cùng process (httpx.ASGITransport, không qua mạng).
+Mỗi kịch bản là một hàm async thực hiện MỘT thao tác (một hoặc vài request) và trả về danh sách status code.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+import httpx
+from sqlalchemy import select
+import database
+import models
+from benchmarks.seed import BENCH_ADMIN_EMAIL, BENCH_EMAIL_DOMAIN, BENCH_PASSWORD
+from utils.time_utils import now_vn
+
+BASE_URL = "http://testserver"
+HX_HEADERS = {"HX-Request": "true"}
+TABS = ("upcoming", "ongoing", "finished")
+# Từ khóa admin hay gõ: có dấu / không dấu, họ, họ + đệm, tên ngắn, email
+SEARCH_TERMS = ("nguyen", "Trần", "le", "pham van", "Nguyễn Thị", "hai", "đức", "bench-user-1", "huy")
+
+
+@dataclass
+class BenchContext:
+    app: object
+    rng: random.Random
+    admin: httpx.AsyncClient | None = None
+    users: list[httpx.AsyncClient] = field(default_factory=list)
+    user_emails: list[str] = field(default_factory=list)
+    event_ids: list[int] = field(default_factory=list)
+    # Sự kiện sắp diễn ra, chưa khóa: mục tiêu của join/leave
+    open_event_ids: list[int] = field(default_factory=list)
+    search_terms: list[str] = field(default_factory=list)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url=BASE_URL)
+
+    def any_user(self) -> httpx.AsyncClient:
+        return self.rng.choice(self.users)
+
+    async def aclose(self):
+        for client in [self.admin, *self.users]:
+            if client is not None:
+                await client.aclose()
+
+
+async def signin(client: httpx.AsyncClient, email: str) -> int:
+    response = await client.post("/api/auth/signin/", data={"username": email, "password": BENCH_PASSWORD})
+    return response.status_code
+
+
+async def build_context(app, sessions: int, rng_seed: int) -> BenchContext:
+    """Đọc id sự kiện/user từ DB đã seed, đăng nhập sẵn admin + `sessions` user (mỗi user một cookie jar)."""
+    ctx = BenchContext(app=app, rng=random.Random(rng_seed), search_terms=list(SEARCH_TERMS))
+    async with database.AsyncSessionLocal() as db:
+        ctx.event_ids = (await db.execute(
+            select(models.Event.event_id).where(models.EVENT_NOT_DELETED)
+        )).scalars().all()
+        ctx.open_event_ids = (await db.execute(
+            select(models.Event.event_id).where(
+                models.EVENT_NOT_DELETED,
+                models.Event.is_locked == False,
+                models.Event.start_at > now_vn(),
+            )
+        )).scalars().all()
+        ctx.user_emails = (await db.execute(
+            select(models.User.email)
+            .where(models.User.email.like(f"bench-user-%@{BENCH_EMAIL_DOMAIN}"))
+            .order_by(models.User.user_id)
+        )).scalars().all()
+    if not ctx.event_ids or not ctx.user_emails:
+        raise RuntimeError("DB chưa có dữ liệu benchmark: chạy python -m benchmarks.seed trước")
+
+    ctx.admin = ctx.client()
+    if await signin(ctx.admin, BENCH_ADMIN_EMAIL) != 200:
+        raise RuntimeError(f"Không đăng nhập được {BENCH_ADMIN_EMAIL}")
+    for email in ctx.rng.sample(ctx.user_emails, min(sessions, len(ctx.user_emails))):
+        client = ctx.client()
+        if await signin(client, email) != 200:
+            raise RuntimeError(f"Không đăng nhập được {email}")
+        ctx.users.append(client)
+    return ctx
+
+
+# ========== KỊCH BẢN ==========
+
+async def events_table(ctx: BenchContext) -> list[int]:
+    response = await ctx.any_user().get("/partials/events-table", params={"tab": ctx.rng.choice(TABS)})
+    return [response.status_code]
+
+async def dashboard(ctx: BenchContext) -> list[int]:
+    response = await ctx.any_user().get("/")
+    return [response.status_code]
+
+async def join_leave(ctx: BenchContext) -> list[int]:
+    """Nhiều user cùng tranh vài sự kiện: join rồi leave ngay để dữ liệu không đổi sau mỗi lần chạy."""
+    client = ctx.any_user()
+    event_id = ctx.rng.choice(ctx.open_event_ids[:5])
+    role = ctx.rng.choice(("instructor", "teaching_assistant"))
+    joined = await client.post(f"/api/events/{event_id}/join/", data={"role": role})
+    if joined.status_code != 200:
+        # 400 = hết chỗ / đã tham gia: kết quả hợp lệ khi tranh chấp
+        return [joined.status_code]
+    left = await client.post(f"/api/events/{event_id}/leave/")
+    return [joined.status_code, left.status_code]
+
+async def signin_burst(ctx: BenchContext) -> list[int]:
+    # Client mới mỗi lần: đo đúng đường đăng nhập (băm mật khẩu + tạo token), không dùng lại cookie
+    async with ctx.client() as client:
+        return [await signin(client, ctx.rng.choice(ctx.user_emails))]
+
+async def admin_search(ctx: BenchContext) -> list[int]:
+    response = await ctx.admin.get("/admin/users", params={"search": ctx.rng.choice(ctx.search_terms)}, headers=HX_HEADERS)
+    return [response.status_code]
+
+async def candidate_modal(ctx: BenchContext) -> list[int]:
+    params = {"role_to_add": "teaching_assistant", "page": ctx.rng.randint(1, 20)}
+    if ctx.rng.random() < 0.3:
+        params = {"role_to_add": "teaching_assistant", "page": 1, "q": ctx.rng.choice(ctx.search_terms)}
+    response = await ctx.admin.get(f"/events/partials/events/{ctx.rng.choice(ctx.event_ids)}/candidates", params=params)
+    return [response.status_code]
+
+
+@dataclass
+class Scenario:
+    run: Callable[[BenchContext], Awaitable[list[int]]]
+    # Status nằm ngoài danh sách này bị tính là lỗi
+    expected: frozenset = frozenset({200})
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "events_table": Scenario(events_table),
+    "dashboard": Scenario(dashboard),
+    "join_leave": Scenario(join_leave, expected=frozenset({200, 400})),
+    "signin_burst": Scenario(signin_burst),
+    "admin_search": Scenario(admin_search),
+    "candidate_modal": Scenario(candidate_modal),
+}
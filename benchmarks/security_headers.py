@@ -0,0 +1,106 @@
+"""
+So sánh requests/s trên /ping giữa header bảo mật kiểu cũ (@app.middleware("http") = BaseHTTPMiddleware,
+dựng lại chuỗi CSP mỗi response) và SecurityHeadersMiddleware (ASGI thuần, header dựng sẵn).
+
+    python -m benchmarks.security_headers --requests 5000 --concurrency 20
+
+App tối giản chỉ có /ping, chạy trong process qua httpx.ASGITransport -> chỉ đo phần chênh do middleware.
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI, Request
+from helpers.security_headers import SecurityHeadersMiddleware
+
+
+def ping_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "OK"}
+
+    return app
+
+
+def app_without_headers() -> FastAPI:
+    return ping_app()
+
+def app_with_http_middleware() -> FastAPI:
+    """Cách làm cũ trong main.py."""
+    app = ping_app()
+
+    @app.middleware("http")
+    async def add_security_headers(request: Request, call_next):
+        response = await call_next(request)
+        csp_policy = (
+            "default-src 'self'; "
+            "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net https://unpkg.com; "
+            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+            "font-src 'self' https://cdn.jsdelivr.net https://fonts.gstatic.com; "
+            "img-src 'self' data: https:; "
+            "worker-src 'self' blob:;"
+        )
+        response.headers["Content-Security-Policy"] = csp_policy
+        return response
+
+    return app
+
+def app_with_asgi_middleware() -> FastAPI:
+    app = ping_app()
+    app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+VARIANTS = {
+    "no headers": app_without_headers,
+    "http middleware (cũ)": app_with_http_middleware,
+    "ASGI middleware (mới)": app_with_asgi_middleware,
+}
+
+
+async def measure(app, requests: int, concurrency: int, warmup: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        for _ in range(warmup):
+            await client.get("/ping")
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+async def run(requests: int, concurrency: int, warmup: int, rounds: int) -> dict[str, float]:
+    results = {}
+    for name, factory in VARIANTS.items():
+        app = factory()
+        # Lấy kết quả tốt nhất qua vài vòng để bớt nhiễu do máy
+        results[name] = max([await measure(app, requests, concurrency, warmup) for _ in range(rounds)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark middleware header bảo mật trên /ping")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.concurrency, args.warmup, args.rounds))
+    baseline = results["http middleware (cũ)"]
+    print(f"{'variant':<24}{'req/s':>10}{'vs cũ':>10}")
+    for name, rps in results.items():
+        print(f"{name:<24}{rps:>10.0f}{(rps / baseline - 1) * 100:>+9.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Sinh dữ liệu giả cho benchmark: N user, M sự kiện trải đều một học kỳ, người tham gia theo vai trò.
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --users 5000 --events 800
+
+Chạy trên DB riêng cho benchmark (SQLite hoặc Postgres). Dữ liệu sinh theo --seed nên lần nào cũng giống nhau.
+Mọi user benchmark có email bench-user-<i>@bench.local, mật khẩu BENCH_PASSWORD; admin là BENCH_ADMIN_EMAIL.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from sqlalchemy import func, insert, select
+import database
+import models
+import schemas
+import helpers.security as security
+from utils.migrate import migrate
+from utils.text_utils import build_user_search_text
+from utils.time_utils import get_event_times, now_vn
+
+BENCH_PASSWORD = "benchpass123"
+BENCH_ADMIN_EMAIL = "bench-admin@bench.local"
+BENCH_EMAIL_DOMAIN = "bench.local"
+BATCH_SIZE = 1000
+
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương"]
+MIDDLE_NAMES = ["Văn", "Thị", "Hữu", "Minh", "Ngọc", "Thanh", "Quốc", "Đức", "Gia", "Bảo"]
+GIVEN_NAMES = ["An", "Bình", "Châu", "Dũng", "Đức", "Giang", "Hà", "Hải", "Hạnh", "Khoa", "Linh", "Long",
+               "Mai", "Nam", "Phúc", "Quân", "Sơn", "Tâm", "Thảo", "Trang", "Tú", "Việt", "Yến", "Huy"]
+SCHOOLS = ["THPT Quốc Học", "THPT Hai Bà Trưng", "THPT Nguyễn Huệ", "THCS Nguyễn Tri Phương",
+           "THPT Gia Hội", "THCS Trần Cao Vân", "THPT Chuyên Khoa học", "Tiểu học Vĩnh Ninh"]
+# (tiết bắt đầu, số tiết tối đa) cho buổi sáng / chiều / tối
+SESSIONS = [(1, 10), (11, 10), (21, 6)]
+SEMESTER_WEEKS = 20
+
+
+def chunked(rows: list, size: int = BATCH_SIZE):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def reset_schema():
+    models.Base.metadata.drop_all(bind=database.engine)
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS alembic_version")
+
+
+def make_users(rng: random.Random, count: int, password_hash: str) -> list[dict]:
+    rows = [{
+        "email": BENCH_ADMIN_EMAIL,
+        "full_name": "Bench Admin",
+        "phone": "0400000000",
+        "role": schemas.UserRole.ADMIN.value,
+    }]
+    for i in range(count):
+        rows.append({
+            "email": f"bench-user-{i}@{BENCH_EMAIL_DOMAIN}",
+            "full_name": f"{rng.choice(FAMILY_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}",
+            "phone": f"04{i + 1:08d}",
+            "role": schemas.UserRole.USER.value,
+        })
+    for row in rows:
+        row.update(
+            hashed_password=password_hash,
+            status=True,
+            is_deleted=False,
+            token_version=0,
+            search_text=build_user_search_text(row["full_name"], row["email"], row["phone"]),
+        )
+    return rows
+
+
+def make_events(rng: random.Random, count: int, semester_start: date) -> list[dict]:
+    rows = []
+    for i in range(count):
+        # Thứ 2 - thứ 7 trong SEMESTER_WEEKS tuần
+        day = semester_start + timedelta(weeks=rng.randrange(SEMESTER_WEEKS), days=rng.randrange(6))
+        first, length = rng.choice(SESSIONS)
+        start_period = first + rng.randrange(length - 1)
+        end_period = min(first + length - 1, start_period + rng.randint(1, 5))
+        max_instructor = rng.choice([1, 1, 1, 2])
+        max_teaching_assistant = rng.randint(1, 4)
+        start_at, end_at = get_event_times(day, start_period, end_period)
+        rows.append({
+            "name": f"Workshop Robotics #{i + 1}",
+            "school_name": rng.choice(SCHOOLS),
+            "day_start": day,
+            "start_period": start_period,
+            "end_period": end_period,
+            "number_of_student": rng.randint(20, 60),
+            # ~3% sự kiện đã xóa, ~10% đã khóa đăng ký
+            "status": schemas.EventStatus.DELETED.value if rng.random() < 0.03 else schemas.EventStatus.ONGOING.value,
+            "is_locked": rng.random() < 0.1,
+            "max_instructor": max_instructor,
+            "max_teaching_assistant": max_teaching_assistant,
+            "max_user_joined": max_instructor + max_teaching_assistant,
+            "start_at": start_at,
+            "end_at": end_at,
+        })
+    return rows
+
+
+def plan_participation(rng: random.Random, events: list[dict], fill: float):
+    """Mỗi vai trò lấp trung bình `fill` số chỗ; ghi sẵn bộ đếm vào dòng sự kiện trước khi insert."""
+    for event in events:
+        event["instructor_count"] = sum(rng.random() < fill for _ in range(event["max_instructor"]))
+        event["teaching_assistant_count"] = sum(rng.random() < fill for _ in range(event["max_teaching_assistant"]))
+
+
+def make_links(rng: random.Random, events: list[dict], event_ids: list[int], user_ids: list[int]) -> list[dict]:
+    links = []
+    for event, event_id in zip(events, event_ids):
+        instructors = event["instructor_count"]
+        chosen = rng.sample(user_ids, instructors + event["teaching_assistant_count"])
+        for n, user_id in enumerate(chosen):
+            links.append({
+                "event_id": event_id,
+                "user_id": user_id,
+                "role": schemas.EventRole.INSTRUCTOR.value if n < instructors else schemas.EventRole.TA.value,
+                "status": "registered",
+            })
+    return links
+
+
+def seed(users: int, events: int, fill: float = 0.6, rng_seed: int = 42, semester_start: date | None = None) -> dict:
+    rng = random.Random(rng_seed)
+    # Mặc định học kỳ bắt đầu 10 tuần trước -> có đủ sự kiện đã xong / đang diễn ra / sắp diễn ra
+    semester_start = semester_start or (now_vn().date() - timedelta(weeks=SEMESTER_WEEKS // 2))
+    semester_start -= timedelta(days=semester_start.weekday())
+
+    started = time.perf_counter()
+    # Mọi user dùng chung một mật khẩu -> chỉ băm một lần
+    password_hash = security.get_password_hash(BENCH_PASSWORD)
+    user_rows = make_users(rng, users, password_hash)
+    event_rows = make_events(rng, events, semester_start)
+    plan_participation(rng, event_rows, fill)
+
+    with database.engine.begin() as conn:
+        for batch in chunked(user_rows):
+            conn.execute(insert(models.User), batch)
+        for batch in chunked(event_rows):
+            conn.execute(insert(models.Event), batch)
+
+        user_ids = conn.execute(
+            select(models.User.user_id)
+            .where(models.User.email.like(f"bench-user-%@{BENCH_EMAIL_DOMAIN}"))
+            .order_by(models.User.user_id)
+        ).scalars().all()
+        # Sự kiện vừa tạo là các event_id lớn nhất (insert theo thứ tự)
+        event_ids = sorted(conn.execute(
+            select(models.Event.event_id).order_by(models.Event.event_id.desc()).limit(len(event_rows))
+        ).scalars().all())
+
+        links = make_links(rng, event_rows, event_ids, user_ids)
+        for batch in chunked(links):
+            conn.execute(insert(models.UserEvent), batch)
+
+        # Ghi thẳng qua engine (không qua Session nên listener không bump) -> server đang chạy
+        # phải thấy version mới để bỏ cache bảng sự kiện và xây lại index tìm user
+        for name in (models.EVENTS_DATA, models.USERS_DATA):
+            models.bump_data_version(conn, name)
+
+    return {
+        "users": len(user_rows),
+        "events": len(event_rows),
+        "participants": len(links),
+        "semester_start": semester_start.isoformat(),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu giả cho benchmark")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=400)
+    parser.add_argument("--fill", type=float, default=0.6, help="Tỉ lệ chỗ đã có người đăng ký (0-1)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="XÓA toàn bộ bảng rồi tạo lại trước khi sinh dữ liệu")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset_schema()
+    migrate()
+    with database.engine.connect() as conn:
+        existing = conn.scalar(select(func.count()).select_from(models.User).where(models.User.email == BENCH_ADMIN_EMAIL))
+    if existing:
+        parser.error("DB đã có dữ liệu benchmark, chạy lại với --reset để sinh mới")
+
+    print(seed(args.users, args.events, fill=args.fill, rng_seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# Cấu hình gunicorn (tự nạp khi chạy `gunicorn main:app` trong thư mục project)
+import gc
+import os
+from utils import preload
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+# GUNICORN_PRELOAD=false: mỗi worker tự import app như trước (vd. khi cần reload code từng worker)
+preload_app = preload.PRELOAD_ENABLED
+
+if preload_app:
+    # Tắt GC trong master từ trước khi import app: GC chạy giữa chừng để lại "lỗ" trong các trang nhớ,
+    # worker ghi vào đó sẽ phải copy cả trang. Master gần như không tạo rác nên không cần GC.
+    gc.disable()
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # server.app.wsgi() trả về app đã import sẵn trong master
+    result = preload.warm_up(server.app.wsgi())
+    server.log.info("Preload: OpenAPI + %d template sẵn sàng sau %s ms, master %s",
+                    result["templates"], result["ms"], preload.memory_usage())
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        preload.freeze_before_fork()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        preload.after_fork()
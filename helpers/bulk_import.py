@@ -0,0 +1,427 @@
+import asyncio
+import csv
+import io
+import json
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy import select, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schemas
+from helpers.password_pool import password_pool
+from helpers.dashboard_stats import dashboard_stats
+from helpers.event_broadcast import event_broadcaster
+from utils.time_utils import get_event_times
+from utils.text_utils import build_user_search_text
+
+# Import hàng loạt từ file CSV/XLSX/JSON: đọc từng dòng (stream), validate bằng schema có sẵn,
+# kiểm tra trùng với DB bằng truy vấn theo tập hợp, rồi insert nhiều dòng một lần.
+
+MAX_IMPORT_ROWS = 5000
+BATCH_SIZE = 500
+
+USER_HEADER_ALIASES = {
+    "email": "email",
+    "gmail": "email",
+    "full_name": "full_name",
+    "ho_ten": "full_name",
+    "họ và tên": "full_name",
+    "họ tên": "full_name",
+    "phone": "phone",
+    "sdt": "phone",
+    "sđt": "phone",
+    "số điện thoại": "phone",
+    "role": "role",
+    "vai trò": "role",
+    "password": "password",
+    "mat_khau": "password",
+    "mật khẩu": "password",
+}
+
+EVENT_HEADER_ALIASES = {
+    "name": "name",
+    "tên": "name",
+    "tên sự kiện": "name",
+    "date": "day_start",
+    "day": "day_start",
+    "day_start": "day_start",
+    "ngày": "day_start",
+    "start_period": "start_period",
+    "tiết bắt đầu": "start_period",
+    "end_period": "end_period",
+    "tiết kết thúc": "end_period",
+    "school": "school_name",
+    "school_name": "school_name",
+    "trường": "school_name",
+    "number_of_student": "number_of_student",
+    "students": "number_of_student",
+    "số học sinh": "number_of_student",
+    "max_instructor": "max_instructor",
+    "số giảng viên": "max_instructor",
+    "max_teaching_assistant": "max_teaching_assistant",
+    "max_ta": "max_teaching_assistant",
+    "số trợ giảng": "max_teaching_assistant",
+}
+
+class ImportFileError(ValueError):
+    """Lỗi ở mức cả file (sai định dạng, thiếu cột, quá nhiều dòng...)."""
+
+
+def chunked(items: list, size: int = BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def finish_report(report: dict) -> dict:
+    report["errors"].sort(key=lambda e: e["row"])
+    return report
+
+def format_validation_error(e: ValidationError) -> str:
+    return str(e.errors()[0].get("msg")).replace("Value error, ", "")
+
+def normalize_cell(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+def normalize_date(value):
+    # Chấp nhận ISO (2025-09-15), kiểu Việt Nam (15/09/2025) hoặc ô ngày của Excel
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = normalize_cell(value)
+    if value and "/" in value:
+        try:
+            return datetime.strptime(value, "%d/%m/%Y").date()
+        except ValueError:
+            pass
+    return value
+
+def normalize_phone(value):
+    # Excel hay tự bỏ số 0 đầu của số điện thoại (0912345678 -> 912345678)
+    value = normalize_cell(value)
+    if value and value.isdigit() and len(value) == 9:
+        value = "0" + value
+    return value
+
+
+def _iter_csv(file, aliases: dict):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if not header:
+            raise ImportFileError("File rỗng")
+        keys = [aliases.get(h.strip().lower()) for h in header]
+        for row_no, values in enumerate(reader, start=2):
+            yield row_no, {k: normalize_cell(v) for k, v in zip(keys, values) if k}
+    except UnicodeDecodeError:
+        raise ImportFileError("File CSV phải được lưu với mã hóa UTF-8")
+    finally:
+        # Không để TextIOWrapper đóng luôn file upload gốc
+        text.detach()
+
+def _iter_json(file, aliases: dict):
+    # JSON: mảng các object, hoặc {"events": [...]} / {"rows": [...]}
+    try:
+        payload = json.load(file)
+    except (ValueError, UnicodeDecodeError):
+        raise ImportFileError("File JSON không hợp lệ")
+    if isinstance(payload, dict):
+        payload = payload.get("events") or payload.get("rows") or []
+    if not isinstance(payload, list):
+        raise ImportFileError("File JSON phải là một mảng các dòng dữ liệu")
+    for row_no, item in enumerate(payload, start=1):
+        if not isinstance(item, dict):
+            item = {}
+        yield row_no, {aliases[k.strip().lower()]: v for k, v in item.items() if k.strip().lower() in aliases}
+
+def _iter_xlsx(file, aliases: dict):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Máy chủ chưa cài openpyxl nên chưa đọc được file .xlsx, vui lòng dùng file .csv")
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError("Không đọc được file .xlsx")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            raise ImportFileError("File rỗng")
+        keys = [aliases.get(str(h).strip().lower()) if h is not None else None for h in header]
+        for row_no, values in enumerate(rows, start=2):
+            yield row_no, {k: v for k, v in zip(keys, values) if k}
+    finally:
+        workbook.close()
+
+def iter_upload_rows(upload: UploadFile, aliases: dict):
+    """Sinh (số dòng trong file, dict dữ liệu) cho từng dòng, bỏ qua dòng trống."""
+    filename = (upload.filename or "").lower()
+    if filename.endswith(".csv"):
+        rows = _iter_csv(upload.file, aliases)
+    elif filename.endswith(".xlsx"):
+        rows = _iter_xlsx(upload.file, aliases)
+    elif filename.endswith(".json"):
+        rows = _iter_json(upload.file, aliases)
+    else:
+        raise ImportFileError("Chỉ hỗ trợ file .csv, .xlsx hoặc .json")
+
+    count = 0
+    for row_no, data in rows:
+        if not any(v not in (None, "") for v in data.values()):
+            continue
+        count += 1
+        if count > MAX_IMPORT_ROWS:
+            raise ImportFileError(f"File vượt quá {MAX_IMPORT_ROWS} dòng, vui lòng chia nhỏ")
+        yield row_no, data
+
+
+# ==========================================
+# IMPORT USER
+# ==========================================
+
+def add_user_error(report: dict, row_no, email, message):
+    report["failed"] += 1
+    report["errors"].append({"row": row_no, "email": email, "message": message})
+
+def read_user_rows(upload: UploadFile, report: dict) -> list:
+    """Đọc + validate từng dòng (schema UserCreateAdmin giống form tạo tài khoản). Chạy trong thread riêng."""
+    valid_rows = []
+    seen_emails: dict[str, int] = {}
+    seen_phones: dict[str, int] = {}
+    for row_no, raw in iter_upload_rows(upload, USER_HEADER_ALIASES):
+        report["total"] += 1
+        email = normalize_cell(raw.get("email"))
+        password = normalize_cell(raw.get("password"))
+        # Không dùng mật khẩu mặc định chung: ai biết mật khẩu đó cũng đăng nhập được mọi tài khoản vừa import
+        if not password:
+            add_user_error(report, row_no, email, "Thiếu mật khẩu")
+            continue
+        try:
+            data = schemas.UserCreateAdmin(
+                email=email,
+                password=password,
+                full_name=normalize_cell(raw.get("full_name")),
+                role=normalize_cell(raw.get("role")) or schemas.UserRole.USER.value,
+                phone=normalize_phone(raw.get("phone")),
+                status=True,
+            )
+        except ValidationError as e:
+            add_user_error(report, row_no, email, format_validation_error(e))
+            continue
+
+        # Các cột bắt buộc trong bảng users mà schema admin chưa kiểm tra
+        if not data.full_name:
+            add_user_error(report, row_no, data.email, "Thiếu họ và tên")
+            continue
+        if not data.phone or not re.fullmatch(r"0\d{9}", data.phone):
+            add_user_error(report, row_no, data.email, "Số điện thoại không hợp lệ (10 số, bắt đầu bằng 0)")
+            continue
+        if data.email in seen_emails:
+            add_user_error(report, row_no, data.email, f"Email trùng với dòng {seen_emails[data.email]} trong file")
+            continue
+        if data.phone in seen_phones:
+            add_user_error(report, row_no, data.email, f"Số điện thoại trùng với dòng {seen_phones[data.phone]} trong file")
+            continue
+
+        seen_emails[data.email] = row_no
+        seen_phones[data.phone] = row_no
+        valid_rows.append((row_no, data))
+
+    return valid_rows
+
+async def import_users(db: AsyncSession, upload: UploadFile, created_by: int | None = None) -> dict:
+    report = {"total": 0, "created": 0, "failed": 0, "errors": []}
+
+    # 1. Parse file (CSV/XLSX/JSON) + validate là việc CPU/IO đồng bộ -> chạy trong thread, không chặn event loop
+    valid_rows = await asyncio.to_thread(read_user_rows, upload, report)
+
+    # 2. Kiểm tra trùng với DB: mỗi lô một truy vấn IN (...) thay vì 2 truy vấn/dòng
+    existing_emails, existing_phones = set(), set()
+    for batch in chunked(valid_rows):
+        result = await db.execute(
+            select(models.User.email, models.User.phone).where(or_(
+                models.User.email.in_([d.email for _, d in batch]),
+                models.User.phone.in_([d.phone for _, d in batch]),
+            ))
+        )
+        for email, phone in result:
+            existing_emails.add(email)
+            existing_phones.add(phone)
+
+    to_create = []
+    for row_no, data in valid_rows:
+        if data.email in existing_emails:
+            add_user_error(report, row_no, data.email, "Email này đã được sử dụng.")
+        elif data.phone in existing_phones:
+            add_user_error(report, row_no, data.email, "Số điện thoại này đã được sử dụng.")
+        else:
+            to_create.append((row_no, data))
+
+    if not to_create:
+        return finish_report(report)
+
+    # 3. Băm mật khẩu song song trên process pool
+    hashes = await asyncio.gather(*(password_pool.hash(data.password) for _, data in to_create))
+
+    # 4. Insert nhiều dòng/lần trong một transaction
+    try:
+        for batch in chunked(list(zip(to_create, hashes))):
+            await db.execute(insert(models.User), [
+                {
+                    "email": data.email,
+                    "hashed_password": hashed_password,
+                    "full_name": data.full_name,
+                    "phone": data.phone,
+                    "role": data.role,
+                    "status": data.status,
+                    "created_by": created_by,
+                    # insert() của Core không chạy listener của model -> tự tính cột tìm kiếm
+                    "search_text": build_user_search_text(data.full_name, data.email, data.phone),
+                }
+                for (_, data), hashed_password in batch
+            ])
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        for row_no, data in to_create:
+            add_user_error(report, row_no, data.email, "Không ghi được do trùng dữ liệu với tài khoản vừa được tạo, vui lòng import lại")
+        return finish_report(report)
+
+    report["created"] = len(to_create)
+    dashboard_stats.invalidate()
+    return finish_report(report)
+
+
+# ==========================================
+# IMPORT LỊCH SỰ KIỆN (CẢ HỌC KỲ)
+# ==========================================
+
+def periods_overlap(a, b) -> bool:
+    return a.start_period <= b.end_period and b.start_period <= a.end_period
+
+def school_key(school_name: str | None) -> str:
+    return (school_name or "").strip().casefold()
+
+async def find_period_overlaps(db: AsyncSession, rows: list) -> dict[int, list[str]]:
+    """
+    Tìm các dòng trùng tiết với dòng khác cùng trường cùng ngày (trong file) hoặc với sự kiện đã có trong DB.
+    Trả về {số dòng: [mô tả trùng]}.
+    """
+    overlaps: dict[int, list[str]] = defaultdict(list)
+
+    # 1. Trong file: gom theo (trường, ngày), sắp theo tiết bắt đầu rồi so các cặp
+    groups = defaultdict(list)
+    for row_no, data in rows:
+        if school_key(data.school_name):
+            groups[(school_key(data.school_name), data.day_start)].append((row_no, data))
+    for group in groups.values():
+        group.sort(key=lambda item: item[1].start_period)
+        for i, (row_a, a) in enumerate(group):
+            for row_b, b in group[i + 1:]:
+                if b.start_period > a.end_period:
+                    break
+                overlaps[row_a].append(f"Trùng tiết với dòng {row_b} (cùng trường, cùng ngày)")
+                overlaps[row_b].append(f"Trùng tiết với dòng {row_a} (cùng trường, cùng ngày)")
+
+    # 2. Với DB: lấy các sự kiện chưa xóa trong những ngày có trong file
+    days = sorted({data.day_start for _, data in rows})
+    existing = defaultdict(list)
+    for batch in chunked(days):
+        result = await db.execute(
+            select(models.Event).where(
+                models.Event.day_start.in_(batch),
+                models.EVENT_NOT_DELETED,
+            )
+        )
+        for event in result.scalars():
+            existing[(school_key(event.school_name), event.day_start)].append(event)
+
+    for row_no, data in rows:
+        for event in existing.get((school_key(data.school_name), data.day_start), []):
+            if school_key(data.school_name) and periods_overlap(data, event):
+                overlaps[row_no].append(f"Trùng tiết với sự kiện #{event.event_id} \"{event.name}\" đã có")
+
+    return overlaps
+
+def read_event_rows(upload: UploadFile, report: dict) -> list:
+    """Đọc + validate từng dòng theo schema EventCreate (giống form tạo sự kiện). Chạy trong thread riêng."""
+    valid_rows = []
+    for row_no, raw in iter_upload_rows(upload, EVENT_HEADER_ALIASES):
+        report["total"] += 1
+        try:
+            max_instructor = raw.get("max_instructor")
+            max_teaching_assistant = raw.get("max_teaching_assistant")
+            max_instructor = int(max_instructor) if normalize_cell(max_instructor) is not None else 1
+            max_teaching_assistant = int(max_teaching_assistant) if normalize_cell(max_teaching_assistant) is not None else 1
+            data = schemas.EventCreate(
+                name=normalize_cell(raw.get("name")),
+                day_start=normalize_date(raw.get("day_start")),
+                start_period=normalize_cell(raw.get("start_period")),
+                end_period=normalize_cell(raw.get("end_period")),
+                number_of_student=normalize_cell(raw.get("number_of_student")) or 0,
+                school_name=normalize_cell(raw.get("school_name")),
+                max_instructor=max_instructor,
+                max_teaching_assistant=max_teaching_assistant,
+                # Giống form tạo sự kiện: tổng số người = giảng viên + trợ giảng
+                max_user_joined=max_instructor + max_teaching_assistant,
+            )
+        except ValidationError as e:
+            report["failed"] += 1
+            report["errors"].append({"row": row_no, "message": format_validation_error(e)})
+            continue
+        except (TypeError, ValueError):
+            report["failed"] += 1
+            report["errors"].append({"row": row_no, "message": "Số lượng giảng viên/trợ giảng phải là số nguyên"})
+            continue
+        valid_rows.append((row_no, data))
+    return valid_rows
+
+async def import_events(db: AsyncSession, upload: UploadFile, dry_run: bool = False) -> dict:
+    """
+    Import lịch sự kiện hàng loạt. Dòng lỗi validate bị bỏ qua, dòng trùng tiết chỉ được cảnh báo.
+    dry_run=True: chỉ kiểm tra và trả về báo cáo, không ghi gì vào DB.
+    """
+    report = {"total": 0, "valid": 0, "created": 0, "failed": 0, "dry_run": dry_run, "errors": [], "warnings": []}
+
+    # Parse file + validate chạy trong thread, không chặn event loop
+    valid_rows = await asyncio.to_thread(read_event_rows, upload, report)
+
+    report["valid"] = len(valid_rows)
+    overlaps = await find_period_overlaps(db, valid_rows)
+    for row_no in sorted(overlaps):
+        for message in overlaps[row_no]:
+            report["warnings"].append({"row": row_no, "message": message})
+
+    if dry_run or not valid_rows:
+        return finish_report(report)
+
+    # Insert bằng Core nên không đi qua listener của ORM -> tự tính start_at/end_at
+    try:
+        for batch in chunked(valid_rows):
+            values = []
+            for _, data in batch:
+                row = data.model_dump()
+                row["start_at"], row["end_at"] = get_event_times(data.day_start, data.start_period, data.end_period)
+                values.append(row)
+            await db.execute(insert(models.Event), values)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise ImportFileError(f"Lỗi ghi dữ liệu, không có sự kiện nào được tạo: {str(e)}")
+
+    report["created"] = len(valid_rows)
+    dashboard_stats.invalidate()
+    # Một thông báo "reload" cho mọi worker/bảng đang mở thay vì một thông báo cho từng sự kiện
+    await event_broadcaster.publish_table_changed(db)
+    return finish_report(report)
@@ -0,0 +1,58 @@
+from sqlalchemy import update, func, case
+import models
+from schemas import EventStatus
+
+# Giữ chỗ theo vai trò bằng một câu UPDATE có điều kiện:
+#   UPDATE events SET <role>_count = <role>_count + n WHERE event_id = ? AND <role>_count + n <= cap RETURNING ...
+# Database tự khóa dòng sự kiện khi UPDATE nên hai request join cùng lúc không thể cùng lấy chỗ cuối cùng.
+# Không có dòng nào trả về = hết chỗ (hoặc sự kiện vừa bị khóa/xóa).
+
+# Các biến thể role cũ còn trong user_event (giống cách bảng sự kiện phân loại)
+INSTRUCTOR_ROLES = ("instructor", "gv", "giang_vien")
+TA_ROLES = ("teaching_assistant", "ta", "tro_giang")
+
+def is_instructor(role: str) -> bool:
+    return (role or "").lower().strip() in INSTRUCTOR_ROLES
+
+def role_columns(role: str):
+    """Trả về (cột đếm, biểu thức giới hạn) của vai trò. Giới hạn khớp với cách bảng sự kiện hiển thị 'Đã đầy'."""
+    if is_instructor(role):
+        return models.Event.instructor_count, func.coalesce(func.nullif(models.Event.max_instructor, 0), 1)
+    return models.Event.teaching_assistant_count, func.coalesce(models.Event.max_teaching_assistant, 0)
+
+def role_cap(event: models.Event, role: str) -> int:
+    """Bản Python của role_columns() để hiển thị."""
+    if is_instructor(role):
+        return event.max_instructor or 1
+    return event.max_teaching_assistant or 0
+
+def role_count(event: models.Event, role: str) -> int:
+    if is_instructor(role):
+        return event.instructor_count or 0
+    return event.teaching_assistant_count or 0
+
+def reserve_seats(event_id: int, role: str, seats: int = 1, check_total: bool = False, only_open: bool = False):
+    count_col, cap = role_columns(role)
+    stmt = update(models.Event).where(
+        models.Event.event_id == event_id,
+        count_col + seats <= cap,
+    )
+    if check_total:
+        stmt = stmt.where(
+            models.Event.instructor_count + models.Event.teaching_assistant_count + seats <= models.Event.max_user_joined
+        )
+    if only_open:
+        # Kiểm tra lại trạng thái ngay trong câu UPDATE: tránh trường hợp admin vừa khóa/xóa sự kiện
+        stmt = stmt.where(
+            models.Event.status != EventStatus.DELETED.value,
+            models.Event.is_locked.is_not(True),
+        )
+    return stmt.values({count_col: count_col + seats}).returning(
+        models.Event.instructor_count, models.Event.teaching_assistant_count
+    )
+
+def release_seats(event_id: int, role: str, seats: int = 1):
+    count_col, _ = role_columns(role)
+    return update(models.Event).where(models.Event.event_id == event_id).values({
+        count_col: case((count_col >= seats, count_col - seats), else_=0)
+    }).returning(models.Event.instructor_count, models.Event.teaching_assistant_count)
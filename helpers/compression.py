@@ -0,0 +1,218 @@
+import os
+import threading
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from helpers.static_assets import STATIC_PREFIX, accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # Không có Brotli: chỉ nén gzip
+    brotli = None
+
+# Nén response động (HTML partial của HTMX, JSON, /metrics) theo Accept-Encoding, ASGI thuần:
+# - Chỉ nén content-type trong COMPRESSIBLE_TYPES và body >= COMPRESSION_MIN_SIZE byte.
+# - Bỏ qua /static (đã có bản .br/.gz nén sẵn), response đã có Content-Encoding, SSE (text/event-stream),
+#   response từng phần (Content-Range) và Cache-Control: no-transform.
+# - Response nhiều chunk (StreamingResponse) được nén từng chunk + flush -> client vẫn nhận dần, không bị gom lại.
+# - Chỉ thêm/sửa Content-Encoding, Content-Length, Vary, ETag (chuyển sang weak); các header HX-* giữ nguyên.
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 500))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+# Mức 4-5 cho nén động: gần bằng gzip -9 về kích thước nhưng nhanh hơn nhiều; mức 11 chỉ dành cho file tĩnh build sẵn
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
+COMPRESSIBLE_TYPES = frozenset({
+    "text/html", "text/plain", "text/css", "text/csv", "text/javascript", "text/xml",
+    "application/json", "application/javascript", "application/xml", "application/manifest+json",
+    "image/svg+xml",
+})
+# Ưu tiên br khi client nhận cả hai
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    return next((name for name in SUPPORTED_ENCODINGS if name in accepted), None)
+
+
+class _GzipEncoder:
+    def __init__(self):
+        # wbits=31: định dạng gzip (header + CRC), không phải zlib thô
+        self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+ENCODERS = {"gzip": _GzipEncoder, "br": _BrotliEncoder}
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses: dict[str, int] = {}
+        self.bytes_in: dict[str, int] = {}
+        self.bytes_out: dict[str, int] = {}
+        self.skipped_small = 0
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int):
+        with self._lock:
+            self.responses[encoding] = self.responses.get(encoding, 0) + 1
+            self.bytes_in[encoding] = self.bytes_in.get(encoding, 0) + bytes_in
+            self.bytes_out[encoding] = self.bytes_out.get(encoding, 0) + bytes_out
+
+    def record_small(self):
+        with self._lock:
+            self.skipped_small += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": COMPRESSION_ENABLED,
+                "encodings": list(SUPPORTED_ENCODINGS),
+                "min_size": COMPRESSION_MIN_SIZE,
+                "skipped_small": self.skipped_small,
+                "by_encoding": {
+                    encoding: {
+                        "responses": count,
+                        "bytes_in": self.bytes_in[encoding],
+                        "bytes_out": self.bytes_out[encoding],
+                        "ratio": round(self.bytes_out[encoding] / self.bytes_in[encoding], 3) if self.bytes_in[encoding] else 0.0,
+                    }
+                    for encoding, count in self.responses.items()
+                },
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def _is_compressible(message) -> bool:
+    status = message["status"]
+    if status < 200 or status in (204, 304):
+        return False
+    headers = Headers(raw=message.get("headers", []))
+    if "content-encoding" in headers or "content-range" in headers:
+        return False
+    if "no-transform" in headers.get("cache-control", "").lower():
+        return False
+    content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if content_type not in COMPRESSIBLE_TYPES:
+        return False
+    length = headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) < COMPRESSION_MIN_SIZE:
+        compression_stats.record_small()
+        return False
+    return True
+
+
+class _CompressingSend:
+    """Bọc `send` của một response: giữ lại http.response.start tới chunk body đầu tiên để quyết định có nén không."""
+
+    def __init__(self, send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self.start_message = None
+        self.passthrough = False
+        self.encoder = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _set_encoded_headers(self, start_message, content_length: int | None):
+        headers = MutableHeaders(scope=start_message)
+        headers["content-encoding"] = self.encoding
+        if content_length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(content_length)
+        vary = headers.get("vary")
+        if vary is None:
+            headers["vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["vary"] = f"{vary}, Accept-Encoding"
+        # Bản nén khác từng byte với bản gốc -> ETag mạnh phải thành weak (RFC 9110)
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+
+    async def __call__(self, message):
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if _is_compressible(message):
+                self.start_message = message
+            else:
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            # Loại message khác (trailers...): gửi nguyên trạng, không nén phần còn lại
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            self.passthrough = True
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        self.bytes_in += len(body)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body:
+                # Response một chunk (TemplateResponse, JSONResponse): biết đủ kích thước để quyết định
+                if len(body) < COMPRESSION_MIN_SIZE:
+                    compression_stats.record_small()
+                    self.passthrough = True
+                    await self.send(start)
+                    await self.send(message)
+                    return
+                compressed = ENCODERS[self.encoding]().finish(body)
+                self._set_encoded_headers(start, len(compressed))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                compression_stats.record(self.encoding, len(body), len(compressed))
+                return
+            self.encoder = ENCODERS[self.encoding]()
+            self._set_encoded_headers(start, None)
+            await self.send(start)
+
+        data = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        self.bytes_out += len(data)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+        if not more_body:
+            compression_stats.record(self.encoding, self.bytes_in, self.bytes_out)
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD" or scope["path"].startswith(STATIC_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding))
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+
+# Số liệu dashboard giống nhau cho mọi user -> tính một lần rồi dùng chung trong vài giây.
+# Snapshot bị xóa ngay khi sự kiện/user được tạo, sửa hoặc xóa; TTL chỉ để số liệu tự "trôi" theo
+# thời gian (sự kiện bắt đầu/kết thúc). Cache nằm trong từng process như user_cache.
+
+DASHBOARD_STATS_TTL_SECONDS = float(os.getenv("DASHBOARD_STATS_TTL_SECONDS", 15))
+RECENT_PAST_LIMIT = 2
+
+
+def build_stats_query(now: datetime):
+    """Một câu aggregate duy nhất: đếm có điều kiện trên start_at/end_at + tổng user (scalar subquery)."""
+    total_users = (
+        select(func.count())
+        .select_from(models.User)
+        .where(models.User.is_deleted == False)
+        .scalar_subquery()
+    )
+    return select(
+        func.count(case((models.Event.start_at > now, 1))).label("upcoming_count"),
+        func.count(case((models.Event.end_at < now, 1))).label("past_count"),
+        total_users.label("total_users"),
+    ).where(models.EVENT_NOT_DELETED)
+
+def build_recent_past_query(now: datetime):
+    # Chỉ lấy sự kiện chưa bị xóa, mới kết thúc gần nhất (dùng index end_at)
+    return (
+        select(models.Event.event_id, models.Event.name, models.Event.school_name, models.Event.end_at)
+        .where(
+            models.EVENT_NOT_DELETED,
+            models.Event.end_at < now,
+        )
+        .order_by(models.Event.end_at.desc(), models.Event.event_id.desc())
+        .limit(RECENT_PAST_LIMIT)
+    )
+
+
+class DashboardStatsCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: dict | None = None
+        self._expires_at = 0.0
+        # Tăng mỗi lần invalidate: snapshot đang tính dở từ dữ liệu cũ sẽ không được lưu lại
+        self._generation = 0
+        # invalidate() được gọi cả từ route sync (threadpool) -> threading.Lock
+        self._lock = threading.Lock()
+        # Nhiều request cùng miss chỉ chạy query một lần
+        self._refresh_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _current(self) -> dict | None:
+        with self._lock:
+            if self._snapshot is not None and self._expires_at > time.monotonic():
+                return self._snapshot
+        return None
+
+    async def get(self, db: AsyncSession, now: datetime) -> dict:
+        snapshot = self._current()
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        async with self._refresh_lock:
+            snapshot = self._current()
+            if snapshot is not None:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+
+            with self._lock:
+                generation = self._generation
+            counts = (await db.execute(build_stats_query(now))).one()
+            recent = (await db.execute(build_recent_past_query(now))).mappings().all()
+            snapshot = {
+                "upcoming_count": counts.upcoming_count,
+                "past_count": counts.past_count,
+                "total_users": counts.total_users,
+                "recent_past_events": [dict(row) for row in recent],
+            }
+            if self.ttl > 0:
+                with self._lock:
+                    if generation == self._generation:
+                        self._snapshot = snapshot
+                        self._expires_at = time.monotonic() + self.ttl
+            return snapshot
+
+    def invalidate(self):
+        """Gọi sau khi commit thay đổi sự kiện hoặc user."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "cached": self._current() is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+dashboard_stats = DashboardStatsCache(ttl=DASHBOARD_STATS_TTL_SECONDS)
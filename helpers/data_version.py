@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+
+# Đọc phiên bản dữ liệu dùng chung (bảng data_versions, tăng ngay sau mỗi commit có ghi
+# - xem listener trong models.py). Một câu tra theo khóa chính, rẻ hơn nhiều so với query dữ liệu thật
+# -> dùng làm validator cho ETag/Last-Modified và khóa cache bảng sự kiện, giống nhau ở mọi worker.
+
+# Dòng chưa từng được bump (changed_at NULL) -> Last-Modified cố định thay vì thời điểm khởi động process
+EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def _query(name: str):
+    return select(models.DataVersion.version, models.DataVersion.changed_at).where(models.DataVersion.name == name)
+
+def _to_result(row) -> tuple[int, datetime]:
+    if row is None:
+        return 0, EPOCH
+    version, changed_at = row
+    return version, changed_at.replace(tzinfo=timezone.utc) if changed_at else EPOCH
+
+
+def current_version(db: Session, name: str = models.EVENTS_DATA) -> tuple[int, datetime]:
+    """(version, Last-Modified theo UTC)"""
+    return _to_result(db.execute(_query(name)).first())
+
+async def current_version_async(db: AsyncSession, name: str = models.EVENTS_DATA) -> tuple[int, datetime]:
+    return _to_result((await db.execute(_query(name))).first())
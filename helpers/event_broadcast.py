@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import os
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+import database
+import models
+from helpers.fragment_cache import events_table_cache
+
+# Đẩy thông báo "sự kiện X vừa thay đổi" tới trình duyệt qua SSE (/api/events/stream).
+# - Postgres: gửi qua NOTIFY, mỗi worker gunicorn giữ một kết nối LISTEN riêng -> mọi worker đều nhận được.
+# - SQLite (dev): không có LISTEN/NOTIFY -> chỉ phát trong process hiện tại.
+# Thông báo chỉ chứa id + số người theo vai trò + trạng thái khóa; client tự tải lại đúng dòng đó.
+# Thay đổi nhiều dòng một lúc (import sự kiện, đổi tên user) -> {"reload": true}: client tải lại cả bảng.
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "event_updated"
+# Số thông báo tối đa đang chờ của một client; client chậm quá sẽ bị bỏ bớt thông báo thay vì giữ RAM
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", 100))
+LISTEN_RETRY_SECONDS = 5
+TABLE_CHANGED_PAYLOAD = json.dumps({"reload": True}, separators=(",", ":"))
+
+IS_POSTGRES = database.engine.dialect.name == "postgresql"
+
+
+def build_notice_query(event_id: int):
+    return select(
+        models.Event.event_id,
+        models.Event.instructor_count,
+        models.Event.teaching_assistant_count,
+        models.Event.is_locked,
+        models.Event.status,
+    ).where(models.Event.event_id == event_id)
+
+def to_payload(row) -> str:
+    if row is None:
+        return ""
+    return json.dumps({
+        "event_id": row.event_id,
+        "instructor_count": row.instructor_count,
+        "teaching_assistant_count": row.teaching_assistant_count,
+        "is_locked": bool(row.is_locked),
+        "status": row.status,
+    }, separators=(",", ":"))
+
+def hx_event_updated(event_id: int) -> str:
+    """Giá trị header HX-Trigger: client chỉ tải lại dòng của sự kiện này."""
+    return json.dumps({CHANNEL: {"event_id": event_id}})
+
+
+class EventBroadcaster:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._listener_task: asyncio.Task | None = None
+        self.published = 0
+        self.dropped = 0
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if IS_POSTGRES and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _fan_out(self, payload: str):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    def _on_notify(self, payload: str):
+        # Thay đổi có thể đến từ worker khác -> cache bảng sự kiện của worker này cũng phải bỏ
+        events_table_cache.bump()
+        self._fan_out(payload)
+
+    def _dispatch(self, payload: str):
+        # Route sync chạy trong threadpool -> phải chuyển về event loop trước khi đụng vào asyncio.Queue
+        if self._loop is None or self._loop.is_closed() or not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fan_out(payload)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, payload)
+
+    async def _send(self, db: AsyncSession, payload: str):
+        self.published += 1
+        if IS_POSTGRES:
+            await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+            await db.commit()
+        else:
+            self._dispatch(payload)
+
+    def _send_sync(self, db: Session, payload: str):
+        self.published += 1
+        if IS_POSTGRES:
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+            db.commit()
+        else:
+            self._dispatch(payload)
+
+    async def publish(self, db: AsyncSession, event_id: int):
+        """Gọi SAU khi commit: đọc lại trạng thái đã lưu của sự kiện rồi phát đi."""
+        events_table_cache.bump()
+        payload = to_payload((await db.execute(build_notice_query(event_id))).first())
+        if payload:
+            await self._send(db, payload)
+
+    def publish_sync(self, db: Session, event_id: int):
+        events_table_cache.bump()
+        payload = to_payload(db.execute(build_notice_query(event_id)).first())
+        if payload:
+            self._send_sync(db, payload)
+
+    async def publish_table_changed(self, db: AsyncSession):
+        """Gọi SAU khi commit một thay đổi không gắn với một sự kiện (import, đổi tên user)."""
+        events_table_cache.bump()
+        await self._send(db, TABLE_CHANGED_PAYLOAD)
+
+    def publish_table_changed_sync(self, db: Session):
+        events_table_cache.bump()
+        self._send_sync(db, TABLE_CHANGED_PAYLOAD)
+
+    async def _listen_forever(self):
+        import asyncpg  # chỉ cần khi chạy Postgres
+
+        dsn = database.async_engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                lost = asyncio.get_running_loop().create_future()
+                conn.add_termination_listener(lambda _conn: lost.done() or lost.set_result(None))
+                await conn.add_listener(CHANNEL, lambda _conn, _pid, _channel, payload: self._on_notify(payload))
+                await lost
+            except asyncio.CancelledError:
+                if conn is not None:
+                    await conn.close()
+                raise
+            except Exception as e:
+                logger.warning("LISTEN %s bị ngắt: %s, thử lại sau %ss", CHANNEL, e, LISTEN_RETRY_SECONDS)
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgres" if IS_POSTGRES else "in-process",
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+event_broadcaster = EventBroadcaster(queue_size=SSE_QUEUE_SIZE)
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cache phần dùng chung của bảng sự kiện (view model từng dòng) theo (tab, cursor, data_version, khoảng thời gian).
+# data_version dùng chung trong DB (bảng data_versions) tăng sau mỗi commit có ghi
+# sự kiện/người tham gia -> entry cũ không bao giờ được đọc lại ở bất kỳ worker nào, kể cả entry đang tính dở.
+# Phần riêng của từng user (đã tham gia? vai trò?) được ghép lúc request.
+# bump() (khi có ghi / nhận NOTIFY event_updated) chỉ dọn sớm các entry cũ trong process cho đỡ tốn bộ nhớ.
+
+EVENTS_TABLE_CACHE_TTL_SECONDS = float(os.getenv("EVENTS_TABLE_CACHE_TTL_SECONDS", 30))
+EVENTS_TABLE_CACHE_MAXSIZE = int(os.getenv("EVENTS_TABLE_CACHE_MAXSIZE", 64))
+
+
+class VersionedFragmentCache:
+    """LRU + hạn dùng cho từng entry, khóa luôn kèm data_version hiện tại."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._data: OrderedDict = OrderedDict()
+        # bump() được gọi cả từ route sync (threadpool) -> cần lock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bumps = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def key(self, *parts) -> tuple:
+        return (*parts, self.version)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        """ttl: hạn dùng riêng (giây), không vượt quá ttl mặc định của cache."""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def bump(self):
+        """Gọi sau mỗi lần ghi sự kiện/người tham gia."""
+        with self._lock:
+            self.version += 1
+            self.bumps += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "data_version": self.version,
+                "bumps": self.bumps,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+events_table_cache = VersionedFragmentCache(
+    maxsize=EVENTS_TABLE_CACHE_MAXSIZE,
+    ttl=EVENTS_TABLE_CACHE_TTL_SECONDS,
+)
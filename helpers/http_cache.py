@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+# Conditional GET (ETag / Last-Modified -> 304) cho các route đọc sự kiện.
+# ETag ghép từ data_version dùng chung trong DB (helpers/data_version.py): một câu tra theo khóa chính
+# trước khi đụng tới ORM, và cùng dữ liệu thì mọi worker phát ra cùng một ETag -> 304 ở bất kỳ worker nào.
+
+# private: chỉ trình duyệt được lưu (dữ liệu theo user); no-cache: luôn hỏi lại server trước khi dùng bản lưu
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """So sánh kiểu weak theo RFC 9110 với header If-None-Match (có thể là danh sách hoặc *)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _strip_weak(etag)
+    return any(_strip_weak(tag) == target for tag in header.split(","))
+
+def not_modified_since(request: Request, last_modified: datetime) -> bool:
+    # If-Modified-Since chỉ được xét khi client không gửi If-None-Match
+    if request.headers.get("if-none-match"):
+        return False
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP-date chỉ chính xác tới giây
+    return last_modified.replace(microsecond=0) <= since
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    return etag_matches(request, etag) or not_modified_since(request, last_modified)
+
+def cache_headers(etag: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Cookie",
+    }
+
+def apply_cache_headers(response: Response, etag: str, last_modified: datetime):
+    for name, value in cache_headers(etag, last_modified).items():
+        response.headers[name] = value
+
+def not_modified(etag: str, last_modified: datetime) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
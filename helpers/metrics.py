@@ -0,0 +1,275 @@
+import bisect
+import contextvars
+import hmac
+import os
+import threading
+import time
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import schemas
+
+# Số liệu kiểu Prometheus (text format 0.0.4) không cần thư viện ngoài, phục vụ ở /metrics.
+# - MetricsMiddleware (ASGI thuần): latency theo route (path mẫu, vd. /api/events/{event_id}), status,
+#   số request đang xử lý, số byte trả về, số query + thời gian DB của từng request.
+# - Listener SQLAlchemy trên mọi Engine (sync + async) đếm query vào request hiện tại qua contextvar.
+# - TimedTemplate: thời gian render template Jinja2.
+# Số liệu nằm trong từng process: với nhiều worker gunicorn, mỗi lần scrape chỉ thấy một worker.
+
+# Token cho Prometheus scrape (Authorization: Bearer ...). Admin đã đăng nhập cũng xem được.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Route không khớp (404, quét bậy) gộp chung một nhãn để không nổ số series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: tuple, value: float):
+        # Lưu số đếm theo từng bucket (không cộng dồn); cộng dồn lúc render
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def summary(self) -> dict:
+        """{labels: (số lần, tổng giá trị)} cho các endpoint /api/admin/stats."""
+        with self._lock:
+            return {labels: (count, total) for labels, (_, total, count) in self._values.items()}
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                ((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._values.items()),
+                key=lambda item: item[0],
+            )
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "Số request HTTP đã xử lý.", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Thời gian xử lý request (tới khi gửi xong body).", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Số request đang xử lý (kể cả kết nối SSE đang mở)."))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Số byte body trả về.", ("method", "route"), buckets=SIZE_BUCKETS))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "Số câu SQL trong một request.", ("method", "route"), buckets=DB_QUERY_BUCKETS))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_seconds", "Tổng thời gian chạy SQL trong một request.", ("method", "route")))
+http_request_template_duration = registry.register(Histogram(
+    "http_request_template_seconds", "Tổng thời gian render template trong một request.", ("method", "route")))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "Tổng số câu SQL đã chạy (cả ngoài request)."))
+template_render_duration = registry.register(Histogram(
+    "template_render_seconds", "Thời gian render template Jinja2.", ("template",)))
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds", "template_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+# Object dùng chung giữa event loop và threadpool (route sync): contextvar được copy sang thread
+# nhưng vẫn trỏ tới cùng một RequestStats nên cộng dồn được
+current_request_stats: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar(
+    "current_request_stats", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    db_queries_total.inc()
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Query lỗi không qua after_cursor_execute -> bỏ mốc thời gian của nó
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+class TimedTemplate(Template):
+    """Template Jinja2 ghi lại thời gian render (template con qua include/extends tính vào template gốc)."""
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            template_render_duration.observe((self.name or "<string>",), elapsed)
+            stats = current_request_stats.get()
+            if stats is not None:
+                stats.template_seconds += elapsed
+
+
+def route_label(scope, app_root_path: str) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or route.path
+    # Mount (vd. /static) không gắn "route" vào scope nhưng đổi root_path
+    root_path = scope.get("root_path", "")
+    if root_path != app_root_path:
+        return root_path[len(app_root_path):] + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI thuần (không bọc Request/Response) -> gần như không tốn thêm gì cho mỗi request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        app_root_path = scope.get("root_path", "")
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        body_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            current_request_stats.reset(token)
+
+            labels = (scope["method"], route_label(scope, app_root_path))
+            http_requests_total.inc((*labels, str(status_code)))
+            http_request_duration.observe(labels, elapsed)
+            http_response_size.observe(labels, body_bytes)
+            http_request_db_queries.observe(labels, stats.db_queries)
+            http_request_db_duration.observe(labels, stats.db_seconds)
+            http_request_template_duration.observe(labels, stats.template_seconds)
+
+
+def is_authorized(request, user) -> bool:
+    """Prometheus gửi Bearer METRICS_TOKEN; người xem qua trình duyệt phải là admin."""
+    header = request.headers.get("authorization", "")
+    if METRICS_TOKEN and header.startswith("Bearer "):
+        return hmac.compare_digest(header[len("Bearer "):].encode(), METRICS_TOKEN.encode())
+    return user is not None and user.role == schemas.UserRole.ADMIN.value
@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Request, Response, status
+
+# Cursor "mờ" (opaque) cho keyset pagination: client chỉ cần gửi lại nguyên chuỗi next_cursor,
+# không cần biết bên trong là (thời gian, id) hay gì khác.
+
+def encode_cursor(*values) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise ValueError
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor không hợp lệ")
+
+def decode_datetime_cursor(cursor: str) -> tuple[datetime, int]:
+    """Giải mã cursor dạng (datetime, id) dùng cho bảng sự kiện."""
+    values = decode_cursor(cursor)
+    try:
+        ts, row_id = values
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor không hợp lệ")
+
+def decode_id_cursor(cursor: str) -> int:
+    """Giải mã cursor chỉ gồm id (dùng cho API phân trang theo khóa chính)."""
+    values = decode_cursor(cursor)
+    try:
+        (row_id,) = values
+        return int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor không hợp lệ")
+
+def set_next_cursor(request: Request, response: Response, next_cursor: str | None):
+    """
+    API danh sách vẫn trả về mảng JSON như cũ; cursor trang sau nằm ở header
+    X-Next-Cursor và Link rel="next" (không có = đã hết dữ liệu).
+    """
+    if not next_cursor:
+        return
+    next_url = request.url.remove_query_params("skip").include_query_params(after=next_cursor)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
@@ -0,0 +1,160 @@
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from helpers.metrics import route_label
+
+# Kiểm tra số query của từng request (bật bằng QUERY_AUDIT=1, mặc định tắt -> không tốn gì).
+# - Đếm + lấy "vân tay" từng câu SQL (bỏ giá trị tham số, gộp IN (?, ?, ...)) trong phạm vi một request.
+# - Cùng một vân tay lặp lại >= QUERY_AUDIT_REPEAT_THRESHOLD lần = nghi N+1 (thường do lazy-load trong vòng lặp/template).
+# - Gắn header debug X-Query-Count / X-Query-Time-Ms / X-Query-Repeated vào response và ghi log cảnh báo.
+# Dùng trong test: assert_query_budget(response, ...) đọc các header này.
+
+logger = logging.getLogger(__name__)
+
+QUERY_AUDIT_ENABLED = os.getenv("QUERY_AUDIT", "false").lower() in ("1", "true", "yes")
+QUERY_AUDIT_REPEAT_THRESHOLD = int(os.getenv("QUERY_AUDIT_REPEAT_THRESHOLD", 3))
+# Vượt số query này trong một request thì ghi log cảnh báo
+QUERY_AUDIT_MAX_QUERIES = int(os.getenv("QUERY_AUDIT_MAX_QUERIES", 20))
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PG_PARAM = re.compile(r"\$\d+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """SQL đã bỏ giá trị: hai câu chỉ khác tham số (kể cả độ dài danh sách IN) cho cùng một vân tay."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _PG_PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _PARAM_LIST.sub("(?)", sql)
+
+
+class QueryAudit:
+    """Các câu SQL đã chạy trong một request (hoặc một khối with audit_queries())."""
+
+    def __init__(self):
+        self.fingerprints: Counter = Counter()
+        self.count = 0
+        self.seconds = 0.0
+
+    def record(self, statement: str, elapsed: float):
+        self.fingerprints[fingerprint(statement)] += 1
+        self.count += 1
+        self.seconds += elapsed
+
+    def repeated(self, threshold: int = QUERY_AUDIT_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        """Các câu lặp lại >= threshold lần, nhiều nhất trước."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+current_audit: contextvars.ContextVar[QueryAudit | None] = contextvars.ContextVar("current_audit", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_audit.get() is not None:
+        conn.info.setdefault("audit_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    audit = current_audit.get()
+    started = conn.info.get("audit_started_at")
+    if audit is None or not started:
+        return
+    audit.record(statement, time.perf_counter() - started.pop())
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("audit_started_at"):
+        conn.info["audit_started_at"].pop()
+
+def install():
+    """Gắn listener lên mọi Engine (sync + async). Gọi một lần lúc khởi động khi bật QUERY_AUDIT."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class audit_queries:
+    """
+    Đếm query trong một khối code chạy cùng context (script, job, test gọi hàm trực tiếp):
+        with audit_queries() as audit:
+            ...
+        assert audit.count <= 3 and not audit.repeated()
+    """
+
+    def __enter__(self) -> QueryAudit:
+        install()
+        self.audit = QueryAudit()
+        self._token = current_audit.set(self.audit)
+        return self.audit
+
+    def __exit__(self, *exc):
+        current_audit.reset(self._token)
+        return False
+
+
+class QueryAuditMiddleware:
+    """ASGI thuần: mỗi request một QueryAudit, gắn header debug trước khi gửi response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        app_root_path = scope.get("root_path", "")
+        audit = QueryAudit()
+        token = current_audit.set(audit)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Query chạy sau khi đã gửi header (vd. trong StreamingResponse) không được tính vào header
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-query-count", str(audit.count).encode()),
+                    (b"x-query-time-ms", f"{audit.seconds * 1000:.1f}".encode()),
+                    (b"x-query-repeated", str(len(audit.repeated())).encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_audit.reset(token)
+            self._report(scope, app_root_path, audit)
+
+    @staticmethod
+    def _report(scope, app_root_path: str, audit: QueryAudit):
+        route = f'{scope["method"]} {route_label(scope, app_root_path)}'
+        for sql, n in audit.repeated():
+            logger.warning("Nghi N+1 ở %s: câu SQL lặp %d lần: %s", route, n, sql[:300])
+        if audit.count > QUERY_AUDIT_MAX_QUERIES:
+            logger.warning("%s chạy %d query (ngưỡng %d)", route, audit.count, QUERY_AUDIT_MAX_QUERIES)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+def assert_query_budget(response, max_queries: int, allow_repeated: bool = False):
+    """
+    Dùng trong test (cần QUERY_AUDIT=1 trước khi import main):
+        assert_query_budget(client.get("/events"), max_queries=5)
+    """
+    count = response.headers.get("x-query-count")
+    if count is None:
+        raise QueryBudgetExceeded("Response không có X-Query-Count: chưa bật QUERY_AUDIT=1?")
+    if int(count) > max_queries:
+        raise QueryBudgetExceeded(f"{int(count)} query > ngân sách {max_queries}")
+    if not allow_repeated and int(response.headers.get("x-query-repeated", 0)):
+        raise QueryBudgetExceeded(f"Có {response.headers['x-query-repeated']} câu SQL lặp lại (nghi N+1)")
@@ -7,12 +7,16 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status, Request
 from jose import JWTError, jwt
 import database, models, schemas
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import models, schemas, database
 import os
 from fastapi.responses import HTMLResponse, RedirectResponse
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from helpers.user_cache import user_cache
+from helpers.password_pool import pwd_context, password_pool
 
 load_dotenv()
 
@@ -20,7 +24,6 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/signin/", auto_error=False)
 
 def verify_password(plain_password, hashed_password):
@@ -29,6 +32,13 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Bản async: chạy Argon2 trong process pool, dùng trong các route async def
+async def verify_password_async(plain_password, hashed_password):
+    return await password_pool.verify(plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await password_pool.hash(password)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -41,9 +51,11 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 # Hàm này dùng để lấy user từ cookie (Dùng cho các trang HTML)
+# Dùng async session để việc xác thực không chặn event loop trên mọi request.
+# Lưu ý: user trả về KHÔNG gắn với session sync của route -> route nào cần sửa user thì phải query lại.
 async def get_user_from_cookie(
     request: Request, 
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db)
 ):
     token = request.cookies.get("access_token")
     if not token:
@@ -57,8 +69,16 @@ async def get_user_from_cookie(
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email:
-            user = db.query(models.User).filter(models.User.email == email).first()
+            # Request lặp lại trong thời gian TTL -> lấy từ cache, không chạm DB
+            cache_key = (email, payload.get("v"))
+            user = user_cache.get(cache_key)
+            if user is not None:
+                return user
+
+            result = await db.execute(select(models.User).where(models.User.email == email))
+            user = result.scalars().first()
             if user and user.status:
+                user_cache.set(cache_key, user)
                 return user
     except Exception:
         pass
@@ -87,4 +107,20 @@ async def get_current_admin_from_cookie(
             detail="Truy cập bị từ chối. Bạn không phải là Admin."
         )
     
-    return user
\ No newline at end of file
+    return user
+
+async def require_admin(
+    user: Annotated[models.User | None, Depends(get_user_from_cookie)]
+):
+    """
+    Giống get_current_admin_from_cookie nhưng dành cho API JSON: luôn raise thay vì trả về redirect
+    (dependency trả về RedirectResponse không chặn được request -> handler vẫn chạy).
+    """
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Chưa đăng nhập.")
+    if user.role != schemas.UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Truy cập bị từ chối. Bạn không phải là Admin."
+        )
+    return user
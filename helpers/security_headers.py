@@ -0,0 +1,83 @@
+import os
+
+# Header bảo mật (CSP, nosniff, Referrer-Policy, HSTS) gắn vào mọi response, ASGI thuần:
+# header được dựng sẵn thành bytes một lần lúc khởi động, mỗi response chỉ nối thêm vào danh sách header
+# (không như @app.middleware("http") trước đây: dựng lại chuỗi CSP + bọc response qua BaseHTTPMiddleware,
+# làm chậm mọi request và gom StreamingResponse/SSE).
+# Route cần chính sách khác khai báo trong ROUTE_OVERRIDES (khớp đúng path) hoặc PREFIX_OVERRIDES (khớp đầu path).
+# Header mà route đã tự đặt thì giữ nguyên, không ghi đè.
+
+# Chỉ bật khi site chạy sau HTTPS (vd. SECURITY_HSTS_MAX_AGE=31536000); 0 = không gửi HSTS
+SECURITY_HSTS_MAX_AGE = int(os.getenv("SECURITY_HSTS_MAX_AGE", 0))
+
+# - script-src: giữ 'unsafe-eval' như trước (đã thêm để sửa lỗi JS gặp trên trang).
+# - Thêm các domain CDN (jsdelivr, unpkg) để load thư viện.
+# - style-src/font-src: Cho phép Bootstrap và Google Fonts.
+DEFAULT_CSP = {
+    "default-src": "'self'",
+    "script-src": "'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net https://unpkg.com",
+    "style-src": "'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com",
+    "font-src": "'self' https://cdn.jsdelivr.net https://fonts.gstatic.com",
+    "img-src": "'self' data: https:",
+    "worker-src": "'self'",
+}
+# ReDoc chạy web worker tạo từ blob: -> chỉ trang /redoc mới cần mở worker-src blob:
+REDOC_CSP = {**DEFAULT_CSP, "worker-src": "'self' blob:"}
+
+
+def build_csp(directives: dict[str, str]) -> str:
+    return "; ".join(f"{name} {value}" for name, value in directives.items()) + ";"
+
+
+def build_headers(csp: dict[str, str] | None) -> list[tuple[bytes, bytes]]:
+    headers = {
+        "x-content-type-options": "nosniff",
+        "referrer-policy": "strict-origin-when-cross-origin",
+    }
+    if csp is not None:
+        headers["content-security-policy"] = build_csp(csp)
+    if SECURITY_HSTS_MAX_AGE > 0:
+        headers["strict-transport-security"] = f"max-age={SECURITY_HSTS_MAX_AGE}; includeSubDomains"
+    return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+
+DEFAULT_HEADERS = build_headers(DEFAULT_CSP)
+ROUTE_OVERRIDES = {
+    "/redoc": build_headers(REDOC_CSP),
+}
+PREFIX_OVERRIDES = (
+    # File tĩnh không phải tài liệu HTML -> CSP vô nghĩa, bỏ cho nhẹ response
+    ("/static/", build_headers(None)),
+)
+
+
+def headers_for(path: str) -> list[tuple[bytes, bytes]]:
+    headers = ROUTE_OVERRIDES.get(path)
+    if headers is not None:
+        return headers
+    for prefix, prefix_headers in PREFIX_OVERRIDES:
+        if path.startswith(prefix):
+            return prefix_headers
+    return DEFAULT_HEADERS
+
+
+class SecurityHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        extra = headers_for(scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                existing = {name.lower() for name, _ in headers}
+                headers.extend(header for header in extra if header[0] not in existing)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,112 @@
+import json
+import os
+from mimetypes import guess_type
+from pathlib import Path
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# Phục vụ /static từ thư mục đã build bởi `python -m utils.build_assets`:
+# - Tên file có vân tay nội dung (bootstrap.min.<hash>.css) -> Cache-Control immutable 1 năm,
+#   trình duyệt không hỏi lại server giữa các lần chuyển trang. Template lấy tên qua static_url().
+# - File nén sẵn .br / .gz nằm cạnh file gốc -> chọn theo Accept-Encoding, không nén lúc chạy.
+# Chưa build (dev): phục vụ thẳng static/ như trước, static_url() trả về đường dẫn gốc.
+# Sửa file trong static/ sau khi đã build thì phải build lại (hoặc xóa STATIC_BUILD_DIR).
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = BASE_DIR / "static"
+STATIC_BUILD_DIR = Path(os.getenv("STATIC_BUILD_DIR", str(BASE_DIR / "static_build")))
+MANIFEST_NAME = "manifest.json"
+STATIC_PREFIX = "/static/"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Thứ tự ưu tiên khi client nhận nhiều kiểu nén: br nhỏ hơn gzip
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Các encoding client nhận (bỏ những cái có q=0)."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token)
+    if "*" in accepted:
+        accepted.update(ENCODING_SUFFIXES)
+    return accepted
+
+
+class AssetManifest:
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        # tên gốc (css/x.css) -> tên có vân tay (css/x.<hash>.css)
+        self.files: dict[str, str] = data.get("files", {})
+        self.immutable: set[str] = set(self.files.values())
+        # file (tên gốc lẫn tên có vân tay) -> các bản nén sẵn có
+        self.encodings: dict[str, list[str]] = data.get("encodings", {})
+
+    @classmethod
+    def load(cls, directory: Path) -> "AssetManifest | None":
+        try:
+            with open(directory / MANIFEST_NAME, encoding="utf-8") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return None
+
+
+manifest = AssetManifest.load(STATIC_BUILD_DIR)
+
+
+def static_url(path: str) -> str:
+    """static_url('css/bootstrap-5.3.8/bootstrap.min.css') -> /static/css/bootstrap-5.3.8/bootstrap.min.<hash>.css"""
+    path = path.lstrip("/")
+    if manifest is not None:
+        path = manifest.files.get(path, path)
+    return STATIC_PREFIX + path
+
+
+class AssetStaticFiles(StaticFiles):
+    def __init__(self):
+        self.manifest = manifest
+        super().__init__(directory=STATIC_BUILD_DIR if manifest is not None else STATIC_DIR)
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        if self.manifest is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        rel_path = Path(os.path.relpath(full_path, self.directory)).as_posix()
+        available = self.manifest.encodings.get(rel_path, ())
+        request_headers = Headers(scope=scope)
+        encoding = None
+        if available:
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            encoding = next((name for name in ENCODING_SUFFIXES if name in available and name in accepted), None)
+
+        if encoding is not None:
+            encoded_path = f"{full_path}{ENCODING_SUFFIXES[encoding]}"
+            response = FileResponse(
+                encoded_path,
+                status_code=status_code,
+                stat_result=os.stat(encoded_path),
+                media_type=guess_type(str(full_path))[0] or "text/plain",
+            )
+            response.headers["content-encoding"] = encoding
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if available:
+            response.headers["vary"] = "Accept-Encoding"
+        if rel_path in self.manifest.immutable:
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
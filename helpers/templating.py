@@ -0,0 +1,90 @@
+import os
+import time
+from pathlib import Path
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from helpers import metrics
+from helpers.static_assets import static_url
+
+# Một Jinja2 Environment dùng chung cho mọi router (trước đây mỗi router một Jinja2Templates riêng
+# -> base.html, navbar.html... bị biên dịch lại ở từng router, trong từng worker).
+# - Bytecode cache trên đĩa: worker mới / lần deploy sau nạp bytecode thay vì parse + compile lại source.
+#   Dockerfile chạy `python -m helpers.templating` lúc build để cache có sẵn trong image.
+# - auto_reload tắt mặc định (production): không stat() file template mỗi lần render.
+#   Khi dev sửa template: TEMPLATE_AUTO_RELOAD=1.
+# - precompile() nạp sẵn mọi template lúc khởi động (hoặc trong master khi preload) -> request đầu không chờ compile.
+# - Thời gian render từng template: metrics.TimedTemplate (/metrics và /api/admin/stats/templates).
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TEMPLATES_DIR = BASE_DIR / "templates"
+
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() in ("1", "true", "yes")
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", str(BASE_DIR / ".jinja_cache"))
+
+
+class SharedEnvironment(Environment):
+    def get_template(self, name, parent=None, globals=None):
+        # Code gọi cả "/pages/events.html" lẫn "pages/events.html": chuẩn hóa tên để dùng chung một bản đã biên dịch
+        if isinstance(name, str):
+            name = name.lstrip("/")
+        return super().get_template(name, parent, globals)
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    try:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    except OSError:
+        # Thư mục không ghi được (read-only FS): vẫn chạy, chỉ mất cache trên đĩa
+        return None
+    return FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+
+env = SharedEnvironment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=_bytecode_cache(),
+    # Đủ chỗ cho mọi template, không bị LRU đẩy ra rồi phải nạp lại
+    cache_size=1000,
+)
+env.template_class = metrics.TimedTemplate
+# Đường dẫn file tĩnh có vân tay: {{ static_url('css/x.css') }}
+env.globals["static_url"] = static_url
+
+templates = Jinja2Templates(env=env)
+
+# Thời gian nạp (parse + compile hoặc đọc bytecode) của từng template ở lần precompile gần nhất
+load_seconds: dict[str, float] = {}
+
+
+def precompile() -> dict:
+    started = time.perf_counter()
+    for name in env.list_templates():
+        loaded_at = time.perf_counter()
+        env.get_template(name)
+        load_seconds[name] = time.perf_counter() - loaded_at
+    return {"templates": len(load_seconds), "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def stats() -> dict:
+    renders = metrics.template_render_duration.summary()
+    per_template = {
+        name: {
+            "renders": count,
+            "avg_render_ms": round(total / count * 1000, 2) if count else 0.0,
+            "total_render_ms": round(total * 1000, 1),
+        }
+        for (name,), (count, total) in renders.items()
+    }
+    for name, seconds in load_seconds.items():
+        per_template.setdefault(name, {"renders": 0})["load_ms"] = round(seconds * 1000, 2)
+    return {
+        "auto_reload": env.auto_reload,
+        "bytecode_cache": TEMPLATE_CACHE_DIR if env.bytecode_cache is not None else None,
+        "templates": dict(sorted(per_template.items(), key=lambda item: -item[1].get("total_render_ms", 0))),
+    }
+
+
+if __name__ == "__main__":
+    # Ghi bytecode của mọi template vào TEMPLATE_CACHE_DIR (chạy lúc build image)
+    print(precompile())
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+import models
+
+# Cache user đã xác thực theo (sub, v) của JWT để get_user_from_cookie không phải query DB mỗi request.
+# Cache nằm trong từng process (mỗi worker gunicorn có cache riêng) -> TTL giới hạn độ "cũ" tối đa
+# khi user bị sửa ở worker khác.
+
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", 1024))
+
+USER_COLUMNS = [attr.key for attr in sa_inspect(models.User).column_attrs]
+
+class UserCache:
+    """LRU + TTL cache, lưu snapshot các cột của User (không lưu object gắn session)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        # Invalidate có thể được gọi từ route sync (chạy trong threadpool) -> cần lock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key) -> models.User | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return self._restore(snapshot)
+
+    def set(self, key, user: models.User):
+        if not self.enabled:
+            return
+        snapshot = {name: getattr(user, name) for name in USER_COLUMNS}
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, snapshot)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        """Xóa mọi entry của user (mọi token version). Gọi sau khi user bị sửa/xóa/đăng nhập lại."""
+        with self._lock:
+            stale = [key for key, (_, snapshot) in self._data.items() if snapshot["user_id"] == user_id]
+            for key in stale:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    @staticmethod
+    def _restore(snapshot: dict) -> models.User:
+        # Mỗi request nhận một bản sao riêng ở trạng thái "detached":
+        # đọc cột thoải mái, còn muốn ghi thì route phải query lại user trong session của mình.
+        user = models.User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+
+user_cache = UserCache(maxsize=AUTH_CACHE_MAXSIZE, ttl=AUTH_CACHE_TTL_SECONDS)
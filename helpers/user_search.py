@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from array import array
+from collections import defaultdict
+from sqlalchemy import select, case, false, func
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+import database
+import models
+from helpers.data_version import current_version, current_version_async
+from utils.text_utils import fold_text
+
+# Tìm user không phân biệt dấu trên cột users.search_text (đã bỏ dấu sẵn).
+# - Postgres: LIKE '%q%' dùng index GIN pg_trgm, xếp hạng bằng word_similarity().
+# - SQLite (dev): không có pg_trgm -> index trigram trong bộ nhớ của process tìm ra các user khớp,
+#   SQL chỉ còn tra theo khóa chính. Index gắn với data_versions['users'] nên user được sửa ở worker
+#   khác (hoặc bằng script ngoài) cũng làm mọi worker xây lại index ở lần tìm kế tiếp.
+# Route chỉ cần: await ensure_search_index(db) rồi ghép search_clauses(q) vào câu query;
+# phân trang/đếm tổng làm trong SQL như bình thường, kết quả luôn đầy đủ.
+
+IS_POSTGRES = database.engine.dialect.name == "postgresql"
+# Từ khóa khớp quá nhiều user (hoặc ngắn hơn 3 ký tự, index không lọc được) -> IN (...) với hàng nghìn id
+# còn chậm hơn và có thể vượt giới hạn tham số của SQLite, nên để SQL tự quét LIKE trên search_text.
+FALLBACK_MAX_IDS = 500
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Index trigram thuần Python: trigram -> mảng user_id (array('i') để tiết kiệm RAM)."""
+
+    def __init__(self):
+        self._texts: dict[int, str] = {}
+        self._postings: dict[str, array] = {}
+        # data_versions['users'] lúc đọc dữ liệu để xây index; None = chưa xây
+        self.version: int | None = None
+        self._lock = threading.Lock()
+
+    def build(self, rows, version: int):
+        texts = {}
+        postings = defaultdict(lambda: array("i"))
+        for user_id, text in rows:
+            text = text or ""
+            texts[user_id] = text
+            for gram in trigrams(text):
+                postings[gram].append(user_id)
+        with self._lock:
+            self._texts = texts
+            self._postings = dict(postings)
+            self.version = version
+
+    def search(self, q: str, max_results: int = FALLBACK_MAX_IDS) -> list[int] | None:
+        """Mọi user_id có search_text chứa q; None nếu q quá ngắn hoặc khớp nhiều hơn max_results."""
+        if len(q) < 3:
+            return None
+        with self._lock:
+            texts, postings = self._texts, self._postings
+        lists = [postings.get(gram) for gram in trigrams(q)]
+        if any(ids is None for ids in lists):
+            return []
+        # Chỉ cần duyệt danh sách ngắn nhất rồi kiểm tra lại bằng substring
+        matches = []
+        for user_id in min(lists, key=len):
+            if q in texts[user_id]:
+                matches.append(user_id)
+                if len(matches) > max_results:
+                    return None
+        return matches
+
+    def stats(self) -> dict:
+        return {"documents": len(self._texts), "trigrams": len(self._postings), "version": self.version}
+
+
+user_search_index = TrigramIndex()
+
+
+def _index_rows_query():
+    return select(models.User.user_id, models.User.search_text).where(models.User.is_deleted == False)
+
+# Version đọc TRƯỚC dữ liệu: nếu có ghi xen giữa thì index mang version cũ và bị xây lại lần sau, không bao giờ ngược lại.
+async def ensure_search_index(db: AsyncSession):
+    if IS_POSTGRES:
+        return
+    version, _ = await current_version_async(db, models.USERS_DATA)
+    if user_search_index.version == version:
+        return
+    rows = (await db.execute(_index_rows_query())).all()
+    # Xây index tốn CPU (vài trăm ms với hàng chục nghìn user) -> chạy ngoài event loop
+    await asyncio.to_thread(user_search_index.build, rows, version)
+
+def ensure_search_index_sync(db: Session):
+    if IS_POSTGRES:
+        return
+    version, _ = current_version(db, models.USERS_DATA)
+    if user_search_index.version == version:
+        return
+    user_search_index.build(db.execute(_index_rows_query()).all(), version)
+
+def trigram_search_clauses(folded: str) -> tuple[list, list]:
+    """Postgres: LIKE dùng index GIN ix_users_search_text_trgm, xếp theo word_similarity()."""
+    return (
+        [models.User.search_text.contains(folded, autoescape=True)],
+        [func.word_similarity(folded, models.User.search_text).desc(), models.User.user_id.desc()],
+    )
+
+def search_clauses(q: str) -> tuple[list, list]:
+    """Trả về (điều kiện WHERE, ORDER BY theo độ liên quan) cho từ khóa q."""
+    folded = fold_text(q)
+    if not folded:
+        return [], []
+
+    if IS_POSTGRES:
+        return trigram_search_clauses(folded)
+
+    # Khớp đầu chuỗi > khớp đầu một từ > khớp giữa từ; cùng mức thì vị trí khớp sớm hơn đứng trước
+    text = models.User.search_text
+    pos = func.instr(text, folded)
+    rank_order = [
+        case((pos == 1, 0), (func.substr(text, pos - 1, 1) == " ", 1), else_=2),
+        pos,
+        models.User.user_id,
+    ]
+    user_ids = user_search_index.search(folded)
+    if user_ids is None:
+        return [text.contains(folded, autoescape=True)], rank_order
+    if not user_ids:
+        return [false()], []
+    return [models.User.user_id.in_(user_ids)], rank_order
@@ -1,3 +1,5 @@
+import time
+_import_started = time.perf_counter()
 from fastapi import FastAPI, Request
 from routers.api import admin, auth, events, users
 import models, schemas, routers.api.auth as auth, database
@@ -12,7 +14,7 @@ from helpers.limiter import limiter
 from typing import Annotated
 from pathlib import Path
 from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.docs import get_redoc_html
@@ -26,12 +28,15 @@ from routers.pages import events as events_page
 from routers.pages import admin as pages_admin
 from routers.pages import profile
 from utils import alembic_config
+from helpers import compression, metrics, query_audit
+from helpers.static_assets import AssetStaticFiles, static_url
+from helpers.security_headers import SecurityHeadersMiddleware
 
 app = FastAPI(docs_url="/docs", 
               redoc_url=None,
               lifespan=alembic_config.lifespan
               )
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", AssetStaticFiles(), name="static")
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SessionMiddleware, secret_key=security.SECRET_KEY)
@@ -51,6 +56,9 @@ app.include_router(events_page.router)
 app.include_router(pages_admin.router)
 app.include_router(profile.router)
 
+# Thời gian import app (router, template, engine DB) - phần đầu của thời gian khởi động worker
+alembic_config.startup_timings.record("import_app", _import_started)
+
 # ============================
 # CUSTOM REDOC
 # ============================
@@ -59,28 +67,32 @@ async def redoc_html():
     return get_redoc_html(
         openapi_url=app.openapi_url,
         title=app.title + " - ReDoc",
-        redoc_js_url="/static/js/redoc.standalone.js",
+        redoc_js_url=static_url("js/redoc.standalone.js"),
     )
     
-# Tạo bảng DB
-models.Base.metadata.create_all(bind=database.engine)
-
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Cấu hình CSP:
-    # - script-src: Thêm 'unsafe-eval' để sửa lỗi bạn gặp.
-    # - Thêm các domain CDN (jsdelivr, unpkg) để load thư viện.
-    # - style-src/font-src: Cho phép Bootstrap và Google Fonts.
-    csp_policy = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net https://unpkg.com; "
-        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
-        "font-src 'self' https://cdn.jsdelivr.net https://fonts.gstatic.com; "
-        "img-src 'self' data: https:; "
-        "worker-src 'self' blob:;"
-    )
+# ============================
+# METRICS (Prometheus text format)
+# ============================
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(
+    request: Request,
+    user: Annotated[models.User | None, Depends(security.get_user_from_cookie)]
+):
+    if not metrics.is_authorized(request, user):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
     
-    response.headers["Content-Security-Policy"] = csp_policy
-    return response
\ No newline at end of file
+# CSP + các header bảo mật khác, dựng sẵn một lần (chính sách riêng cho /redoc, /static: helpers/security_headers.py)
+app.add_middleware(SecurityHeadersMiddleware)
+
+# Chỉ bật khi debug/test (QUERY_AUDIT=1): đếm query từng request, cảnh báo N+1, header X-Query-*
+if query_audit.QUERY_AUDIT_ENABLED:
+    query_audit.install()
+    app.add_middleware(query_audit.QueryAuditMiddleware)
+
+# Nén HTML/JSON theo Accept-Encoding (file tĩnh đã nén sẵn, không đi qua đây)
+if compression.COMPRESSION_ENABLED:
+    app.add_middleware(compression.CompressionMiddleware)
+
+# Thêm sau cùng -> bọc ngoài mọi middleware khác, đo trọn thời gian request
+app.add_middleware(metrics.MetricsMiddleware)
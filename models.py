@@ -1,8 +1,12 @@
-from sqlalchemy import Boolean, Column, Integer, String, Date, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Boolean, Column, Integer, String, Date, DateTime, ForeignKey, Text, Index, event, inspect, literal, text
+from sqlalchemy.orm import Session, relationship
+from datetime import datetime, timezone
+import itertools
 from database import Base
 import enum
 from schemas import *
+from utils.time_utils import get_event_times
+from utils.text_utils import build_user_search_text
 
 class User(Base):
     __tablename__ = "users"
@@ -25,9 +29,36 @@ class User(Base):
     creator = relationship("User", remote_side=[user_id]) 
     # ---------------------
 
+    # Họ tên + email + SĐT đã bỏ dấu, chữ thường -> tìm "nguyen" ra "Nguyễn".
+    # Đồng bộ qua listener bên dưới; Postgres có thêm index trigram (pg_trgm) trên cột này.
+    search_text = Column(String, nullable=True)
+
     # Quan hệ ngược lại bảng user_event
     events = relationship("UserEvent", back_populates="user")
 
+    __table_args__ = (
+        # Danh sách user (admin, API) chỉ đọc user chưa xóa, sắp theo user_id
+        Index("ix_users_active_user_id", "user_id",
+              postgresql_where=text("is_deleted = false"), sqlite_where=text("is_deleted = 0")),
+        # Tìm kiếm LIKE '%q%' trên Postgres (helpers/user_search.py); cùng tên với index tạo trong migration c7d2e5a1f390
+        # để DB mới tạo bằng create_all cũng có. SQLite dùng index trong bộ nhớ.
+        Index("ix_users_search_text_trgm", "search_text",
+              postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+    def sync_search_text(self):
+        self.search_text = build_user_search_text(self.full_name, self.email, self.phone)
+
+
+# Index trigram cần extension pg_trgm có trước khi create_all tạo bảng users
+event.listen(User.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _sync_user_search_text(mapper, connection, target):
+    target.sync_search_text()
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -45,9 +76,48 @@ class Event(Base):
     max_instructor = Column(Integer, nullable=True, default=0)
     max_teaching_assistant = Column(Integer, nullable=True, default=1)
 
+    # Số người đã đăng ký theo từng vai trò (denormalized), được cập nhật bằng UPDATE có điều kiện
+    # trong cùng transaction với thao tác join/leave/thêm/xóa -> kiểm tra "đã đầy" không cần COUNT(*)
+    instructor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    teaching_assistant_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Thời điểm bắt đầu/kết thúc tuyệt đối (tính từ day_start + tiết học).
+    # Được đồng bộ tự động qua listener bên dưới, dùng để lọc tab & phân trang bằng SQL.
+    start_at = Column(DateTime, nullable=True, index=True)
+    end_at = Column(DateTime, nullable=True, index=True)
+
     # Quan hệ ngược lại bảng user_event
     participants = relationship("UserEvent", back_populates="event")
-    
+
+    __table_args__ = (
+        # Các tab bảng sự kiện + dashboard: lọc sự kiện chưa xóa theo start_at/end_at,
+        # sắp theo (thời điểm, event_id) -> đọc thẳng theo thứ tự index, không cần sort
+        Index("ix_events_active_start_at", "start_at", "event_id",
+              postgresql_where=text("status <> 'deleted'"), sqlite_where=text("status <> 'deleted'")),
+        Index("ix_events_active_end_at", "end_at", "event_id",
+              postgresql_where=text("status <> 'deleted'"), sqlite_where=text("status <> 'deleted'")),
+        # Import sự kiện: tìm sự kiện chưa xóa trong các ngày có trong file để kiểm tra trùng lịch
+        Index("ix_events_active_day_start", "day_start",
+              postgresql_where=text("status <> 'deleted'"), sqlite_where=text("status <> 'deleted'")),
+    )
+
+    def sync_times(self):
+        if self.day_start is None or self.start_period is None or self.end_period is None:
+            return
+        self.start_at, self.end_at = get_event_times(self.day_start, self.start_period, self.end_period)
+
+
+# Mọi đường tạo/sửa sự kiện qua ORM đều đi qua đây -> start_at/end_at luôn khớp với day_start + tiết
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def _sync_event_times(mapper, connection, target):
+    target.sync_times()
+
+
+# Điều kiện "sự kiện chưa bị xóa" dùng chung cho mọi query đọc sự kiện. Giá trị được ghi thẳng vào SQL
+# (không phải bind param) để planner nhận ra đúng điều kiện của index một phần ix_events_active_*.
+EVENT_NOT_DELETED = Event.status != literal(EventStatus.DELETED.value, literal_execute=True)
+
 
 class UserEvent(Base):
     __tablename__ = "user_event"
@@ -60,4 +130,125 @@ class UserEvent(Base):
     status = Column(String, default="registered") # registered, attended, cancelled
 
     user = relationship("User", back_populates="events")
-    event = relationship("Event", back_populates="participants")
\ No newline at end of file
+    event = relationship("Event", back_populates="participants")
+
+    __table_args__ = (
+        # Khóa chính (event_id, user_id) phục vụ tra theo sự kiện; thêm index cho:
+        # - danh sách giảng viên/trợ giảng của một sự kiện (event_id + role)
+        # - sự kiện của một user (/api/users/me)
+        Index("ix_user_event_event_id_role", "event_id", "role"),
+        Index("ix_user_event_user_id", "user_id"),
+    )
+
+class DataVersion(Base):
+    """
+    Phiên bản dữ liệu dùng chung cho mọi worker (một dòng cho mỗi nhóm dữ liệu).
+    Tăng sau mỗi lần commit có ghi sự kiện/người tham gia/user
+    -> ETag, cache bảng sự kiện, index tìm user tính từ đây luôn khớp giữa các worker.
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Giờ UTC (naive) của lần tăng gần nhất -> Last-Modified
+    changed_at = Column(DateTime, nullable=True)
+
+
+EVENTS_DATA = "events"
+# Dữ liệu tìm kiếm user: index trigram trong bộ nhớ (SQLite) của mỗi worker xây lại khi dòng này đổi
+USERS_DATA = "users"
+# Bảng mà mọi INSERT/UPDATE/DELETE đều làm đổi dữ liệu sự kiện hiển thị
+EVENTS_DATA_TABLES = {Event.__tablename__, UserEvent.__tablename__}
+# Cột của users mà từng nhóm dữ liệu phụ thuộc:
+# - events: họ tên hiện trên bảng sự kiện / danh sách người tham gia
+# - users: search_text được tính lại từ họ tên + email + SĐT lúc flush (sau before_flush) nên theo dõi cột gốc
+DATA_USER_COLUMNS = {
+    EVENTS_DATA: ("full_name", "is_deleted"),
+    USERS_DATA: ("full_name", "email", "phone", "is_deleted"),
+}
+# session.info[...]: tên các nhóm dữ liệu đã bị ghi trong transaction hiện tại, chờ bump sau commit
+PENDING_BUMPS = "pending_data_version_bumps"
+
+
+@event.listens_for(DataVersion.__table__, "after_create")
+def _seed_data_versions(target, connection, **kw):
+    # DB tạo bằng create_all cũng phải có sẵn dòng để UPDATE
+    connection.execute(target.insert(), [{"name": name, "version": 0} for name in (EVENTS_DATA, USERS_DATA)])
+
+
+def bump_data_version(connection, name: str = EVENTS_DATA):
+    connection.execute(
+        DataVersion.__table__.update()
+        .where(DataVersion.__table__.c.name == name)
+        .values(version=DataVersion.__table__.c.version + 1, changed_at=datetime.now(timezone.utc).replace(tzinfo=None))
+    )
+
+
+def _changed_data(session, obj) -> set[str]:
+    """Các nhóm dữ liệu (tên dòng data_versions) bị đổi khi flush obj."""
+    if isinstance(obj, (Event, UserEvent)):
+        return {EVENTS_DATA}
+    if not isinstance(obj, User):
+        return set()
+    if obj in session.new:
+        # User mới chưa tham gia sự kiện nào -> chỉ đổi kết quả tìm kiếm
+        return {USERS_DATA}
+    if obj in session.deleted:
+        return set(DATA_USER_COLUMNS)
+    state = inspect(obj)
+    return {
+        name for name, columns in DATA_USER_COLUMNS.items()
+        if any(state.attrs[column].history.has_changes() for column in columns)
+    }
+
+def _mark_changed(session, name: str = EVENTS_DATA):
+    session.info.setdefault(PENDING_BUMPS, set()).add(name)
+
+
+# Listener áp dụng cho mọi Session (AsyncSession cũng chạy trên Session sync bên dưới).
+# Trong transaction chỉ đánh dấu; version được tăng SAU commit bằng một transaction ngắn riêng.
+# UPDATE dòng data_versions ngay trong transaction ghi sẽ giữ khóa dòng đó tới lúc commit
+# -> mọi join/leave/điểm danh (kể cả ở các sự kiện khác nhau) phải xếp hàng sau nhau.
+@event.listens_for(Session, "before_flush")
+def _mark_on_flush(session, flush_context, instances):
+    changed = itertools.chain(
+        session.new,
+        session.deleted,
+        (obj for obj in session.dirty if session.is_modified(obj)),
+    )
+    for obj in changed:
+        for name in _changed_data(session, obj):
+            _mark_changed(session, name)
+
+
+# Câu UPDATE/INSERT/DELETE viết thẳng (giữ chỗ, import hàng loạt) không đi qua flush
+@event.listens_for(Session, "do_orm_execute")
+def _mark_on_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    table = orm_execute_state.statement.table
+    if table.name in EVENTS_DATA_TABLES:
+        _mark_changed(orm_execute_state.session)
+    elif table.name == User.__tablename__:
+        # INSERT hàng loạt (import user) chỉ thêm user chưa tham gia sự kiện nào
+        if not orm_execute_state.is_insert:
+            _mark_changed(orm_execute_state.session)
+        _mark_changed(orm_execute_state.session, USERS_DATA)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    names = session.info.pop(PENDING_BUMPS, None)
+    if not names:
+        return
+    # Session vừa commit không chạy SQL được nữa -> mượn kết nối khác từ cùng engine.
+    # Reader thấy version mới thì chắc chắn cũng thấy dữ liệu đã commit; trong khoảng vài ms giữa
+    # commit và bump, reader chỉ có thể thấy version cũ (ETag/cache đổi ngay sau đó).
+    with session.get_bind().begin() as connection:
+        for name in sorted(names):
+            bump_data_version(connection, name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_bumps(session):
+    session.info.pop(PENDING_BUMPS, None)
@@ -1,23 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import database, models, schemas
 import helpers.security as security 
+from helpers.user_cache import user_cache
+from helpers.dashboard_stats import dashboard_stats
+from helpers.event_broadcast import event_broadcaster, hx_event_updated
+from helpers.fragment_cache import events_table_cache
+from helpers.user_search import user_search_index
+from utils.db_pool import pool_stats
+from utils.alembic_config import startup_timings
+from helpers.pagination import encode_cursor, decode_id_cursor, set_next_cursor
+from helpers.bulk_import import import_users, ImportFileError
 from datetime import datetime
 from fastapi.responses import HTMLResponse, RedirectResponse # <--- Thêm RedirectResponse
-from fastapi.templating import Jinja2Templates
-from pathlib import Path
+from helpers import templating
+from helpers.compression import compression_stats
+from helpers.templating import templates
 from zoneinfo import ZoneInfo
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 # Tạo Router riêng, prefix là /admin
-# dependencies=[Depends(auth.get_current_admin_user)] đảm bảo TẤT CẢ các API trong này đều bắt buộc quyền Admin
+# dependencies=[Depends(security.require_admin)] đảm bảo TẤT CẢ các API trong này đều bắt buộc quyền Admin
+# (chưa đăng nhập -> 401, không phải Admin -> 403)
 router = APIRouter(
     prefix="/api/admin",
     tags=["Admin Management"],
-    dependencies=[Depends(security.get_current_admin_from_cookie)]
+    dependencies=[Depends(security.require_admin)]
 )
 
 # xem 1 user chi tiết (Admin)
@@ -31,12 +41,27 @@ def get_user_by_id(user_id: int, db: Session = Depends(database.get_db)):
 # 1. Lấy danh sách tất cả Users
 @router.get("/users", response_model=List[schemas.UserResponse])
 def get_all_users(
+    request: Request,
+    response: Response,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: int = Query(100, ge=1, le=1000), 
+    after: Optional[str] = Query(None, description="Cursor trang kế tiếp (lấy từ header X-Next-Cursor)"),
     db: Session = Depends(database.get_db)
 ):
     # Thêm filter(models.User.is_deleted == False)
-    users = db.query(models.User).filter(models.User.is_deleted == False).offset(skip).limit(limit).all()
+    # Keyset theo user_id: trang sâu cũng rẻ như trang đầu (không OFFSET)
+    query = db.query(models.User).filter(models.User.is_deleted == False).order_by(models.User.user_id)
+    if after:
+        query = query.filter(models.User.user_id > decode_id_cursor(after))
+    elif skip:
+        query = query.offset(skip)
+    users = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].user_id)
+    set_next_cursor(request, response, next_cursor)
     return users
 
 # 2. Admin tạo User mới (Set được Role & Status luôn)
@@ -44,7 +69,7 @@ def get_all_users(
 def create_user_by_admin(
     user: schemas.UserCreateAdmin, 
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+    current_user: models.User = Depends(security.require_admin)
 ):
     # Check email trùng
     if db.query(models.User).filter(models.User.email == user.email).first():
@@ -63,19 +88,32 @@ def create_user_by_admin(
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        dashboard_stats.invalidate()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error creating user: " + str(e))
 
     return db_user
 
+# 2b. Admin import hàng loạt User từ file CSV/XLSX, trả về báo cáo từng dòng
+@router.post("/users/import")
+async def import_users_by_admin(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(security.require_admin)
+):
+    try:
+        return await import_users(db, file, created_by=current_user.user_id)
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # 3. Admin cập nhật thông tin User (VD: Đổi quyền, Khóa tài khoản)
 @router.put("/users/{user_id}", response_model=schemas.UserResponse)
 def update_user_by_admin(
     user_id: int, 
     user_update: schemas.UserUpdateAdmin, 
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+    current_user: models.User = Depends(security.require_admin)
 ):
     
     user_to_edit = db.query(models.User).filter(models.User.user_id == user_id).first()
@@ -101,11 +139,16 @@ def update_user_by_admin(
     update_data = user_update.model_dump(exclude_unset=True) # Pydantic v2 dùng model_dump, v1 dùng dict(exclude_unset=True)
     # Nếu bạn dùng Pydantic v1 cũ thì dùng: update_data = user_update.dict(exclude_unset=True)
 
+    name_changed = "full_name" in update_data and update_data["full_name"] != user_to_edit.full_name
     for key, value in update_data.items():
         setattr(user_to_edit, key, value)
     
     db.commit()
     db.refresh(user_to_edit)
+    user_cache.invalidate_user(user_to_edit.user_id)
+    # Tên hiện trên bảng sự kiện -> báo các bảng đang mở tải lại
+    if name_changed:
+        event_broadcaster.publish_table_changed_sync(db)
     return user_to_edit
 
 # 4. Admin xóa User
@@ -113,7 +156,7 @@ def update_user_by_admin(
 async def delete_user(
     user_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+    current_user: models.User = Depends(security.require_admin)
 ):
     user_to_delete = db.query(models.User).filter(models.User.user_id == user_id).first()
     if not user_to_delete:
@@ -142,9 +185,65 @@ async def delete_user(
     user_to_delete.status = False # Tắt kích hoạt luôn để không đăng nhập được
     
     db.commit()
+    # Email đã bị đổi -> phải xóa theo user_id, nếu không cookie cũ vẫn đăng nhập được tới hết TTL
+    user_cache.invalidate_user(user_to_delete.user_id)
+    dashboard_stats.invalidate()
     
     return
 
+# Thống kê cache xác thực (hit/miss) để theo dõi hiệu quả của get_user_from_cookie
+@router.get("/stats/auth-cache")
+def get_auth_cache_stats():
+    return user_cache.stats()
+
+# Thống kê process pool băm mật khẩu (độ sâu hàng đợi, thời gian chờ/chạy trung bình)
+@router.get("/stats/password-hashing")
+def get_password_hashing_stats():
+    return security.password_pool.stats()
+
+# Thống kê snapshot số liệu dashboard
+@router.get("/stats/dashboard")
+def get_dashboard_stats_cache():
+    return dashboard_stats.stats()
+
+# Số kết nối SSE đang mở và số thông báo event_updated đã phát/bị bỏ
+@router.get("/stats/event-stream")
+def get_event_stream_stats():
+    return event_broadcaster.stats()
+
+# Cache bảng sự kiện (hit rate, data_version hiện tại)
+@router.get("/stats/events-table-cache")
+def get_events_table_cache_stats():
+    return events_table_cache.stats()
+
+# Index tìm kiếm user (chỉ dùng trên SQLite; Postgres dùng GIN pg_trgm)
+@router.get("/stats/user-search")
+def get_user_search_stats():
+    return user_search_index.stats()
+
+# Pool kết nối DB của worker này: đang mượn, overflow, thời gian chờ mượn, số lần hết hạn chờ
+@router.get("/stats/db-pool")
+def get_db_pool_stats():
+    return {
+        "sync": pool_stats(database.engine),
+        "async": pool_stats(database.async_engine),
+    }
+
+# Số response đã nén theo từng encoding, byte trước/sau khi nén
+@router.get("/stats/compression")
+def get_compression_stats():
+    return compression_stats.stats()
+
+# Thời gian render trung bình / thời gian nạp của từng template (worker này)
+@router.get("/stats/templates")
+def get_template_stats():
+    return templating.stats()
+
+# Thời gian khởi động của worker này: import app, kiểm tra schema, kết nối LISTEN
+@router.get("/stats/startup")
+def get_startup_stats():
+    return startup_timings.stats()
+
 # ... (các code hiện tại)
 
 # [THÊM ĐOẠN NÀY VÀO CUỐI FILE HOẶC TRONG CLASS ROUTER]
@@ -153,7 +252,7 @@ async def soft_delete_event(
     request: Request,
     event_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(security.get_current_admin_from_cookie) # Chỉ Admin được xóa
+    current_user: models.User = Depends(security.require_admin) # Chỉ Admin được xóa
 ):
     event = db.query(models.Event).filter(models.Event.event_id == event_id).first()
     
@@ -168,9 +267,11 @@ async def soft_delete_event(
     
     db.commit()
     db.refresh(event)
+    dashboard_stats.invalidate()
+    event_broadcaster.publish_sync(db, event_id)
     
     return templates.TemplateResponse("pages/events.html", {
             "request": request,
             "user": current_user,
             "event": event
-        })
\ No newline at end of file
+        }, headers={"HX-Trigger": hx_event_updated(event_id)})
\ No newline at end of file
@@ -3,8 +3,10 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status, APIRouter, BackgroundTasks, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import models, schemas, database
 from dotenv import load_dotenv
 import os
@@ -12,6 +14,8 @@ from utils.email_utils import send_verification_email
 import helpers.security as security
 import re
 from helpers.limiter import limiter
+from helpers.user_cache import user_cache
+from helpers.dashboard_stats import dashboard_stats
 
 router = APIRouter(
     prefix="/api/auth",
@@ -19,7 +23,7 @@ router = APIRouter(
 )
 
 # --- HELPER FUNCTION: Validate & Create First Admin ---
-def create_first_super_admin(db: Session, form_data: OAuth2PasswordRequestForm):
+async def create_first_super_admin(db: AsyncSession, form_data: OAuth2PasswordRequestForm):
     """
     Hàm này chỉ chạy duy nhất 1 lần khi hệ thống chưa có User nào.
     Nó sẽ tạo tài khoản Super Admin và gửi email xác thực.
@@ -37,7 +41,7 @@ def create_first_super_admin(db: Session, form_data: OAuth2PasswordRequestForm):
         raise HTTPException(status_code=400, detail="Mật khẩu khởi tạo phải chứa ít nhất một chữ cái")
 
     # 2. Create User Logic
-    hashed_password = security.get_password_hash(password)
+    hashed_password = await security.get_password_hash_async(password)
     new_admin = models.User(
         email=form_data.username,
         hashed_password=hashed_password,
@@ -49,11 +53,12 @@ def create_first_super_admin(db: Session, form_data: OAuth2PasswordRequestForm):
     
     try:
         db.add(new_admin)
-        db.commit()
-        db.refresh(new_admin)
+        await db.commit()
+        await db.refresh(new_admin)
+        dashboard_stats.invalidate()
         return new_admin # THAY ĐỔI: Trả về user thay vì raise Exception
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Lỗi tạo admin: {str(e)}")
 
     # # 3. Send Verification Email
@@ -84,18 +89,19 @@ async def signin_for_access_token(
     response: Response,
     background_tasks: BackgroundTasks, # Inject BackgroundTasks vào đây
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db)
 ):
     # 1. Tìm user theo Email
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+    result = await db.execute(select(models.User).where(models.User.email == form_data.username))
+    user = result.scalars().first()
     
     # 2. Xử lý trường hợp User chưa tồn tại
     if not user:
         # Nếu DB rỗng -> Tạo Admin đầu tiên
-        user_count = db.query(models.User).count()
+        user_count = await db.scalar(select(func.count()).select_from(models.User))
         if user_count == 0:
             # THAY ĐỔI: Gán user mới tạo vào biến user để code chạy tiếp xuống dưới
-            user = create_first_super_admin(db, form_data)
+            user = await create_first_super_admin(db, form_data)
         else:
             # Nếu DB không rỗng mà tìm không thấy user -> Lỗi đăng nhập
             raise HTTPException(
@@ -105,7 +111,7 @@ async def signin_for_access_token(
             )
 
     # 3. User tồn tại -> Verify Password
-    if not security.verify_password(form_data.password, user.hashed_password):
+    if not await security.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -124,13 +130,15 @@ async def signin_for_access_token(
     try:
         user.token_version = (user.token_version or 0) + 1
         # db.add(user) # Không cần thiết vì object đang được session track
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        # token_version đổi -> bỏ snapshot cũ của user trong cache xác thực
+        user_cache.invalidate_user(user.user_id)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Database integrity error during login")
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
     # 6. Tạo Token & Set Cookie
@@ -221,5 +229,6 @@ async def verify_email(token: str, db: Session = Depends(database.get_db)):
     # activate user
     user.status = True
     db.commit()
+    user_cache.invalidate_user(user.user_id)
     
     return {"message": "Account activated successfully. You can now login."}
\ No newline at end of file
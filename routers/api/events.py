@@ -1,38 +1,81 @@
-from fastapi import APIRouter, Form, Response, Query
+import asyncio
+from fastapi import APIRouter, Form, Response, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 import models, schemas, database
 import helpers.security as security
 from schemas import EventRole
 from datetime import datetime, date, time
-from pathlib import Path
-from fastapi.templating import Jinja2Templates
+from helpers.templating import templates
 from zoneinfo import ZoneInfo
-from utils.constants import PERIOD_START_TIMES, PERIOD_END_TIMES
+from utils.constants import PERIOD_START_TIMES, PERIOD_END_TIMES, DEFAULT_END_TIME
+from utils.time_utils import get_event_times
 from helpers.security import *
+from helpers.bulk_import import import_events, ImportFileError
+from helpers.capacity import reserve_seats, release_seats
+from helpers.dashboard_stats import dashboard_stats
+from helpers.event_broadcast import event_broadcaster, hx_event_updated, CHANNEL
+from helpers.data_version import current_version
+from helpers.http_cache import make_etag, is_not_modified, not_modified, apply_cache_headers
+from helpers.pagination import encode_cursor, decode_id_cursor, set_next_cursor
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 router = APIRouter(
     prefix="/api/events",
     tags=["events"],
 )
 
-# --- Helper function để lấy datetime thực tế ---
-def get_event_times(event_day: date, start_period: int, end_period: int):
-    sh, sm = PERIOD_START_TIMES.get(start_period, (7, 0))
-    eh, em = PERIOD_END_TIMES.get(end_period, (21, 0))
-    start_dt = datetime.combine(event_day, time(sh, sm))
-    end_dt = datetime.combine(event_day, time(eh, em))
-    return start_dt, end_dt
+# Khoảng thời gian gửi comment giữ kết nối SSE (tránh proxy cắt kết nối "im lặng")
+SSE_KEEPALIVE_SECONDS = 15
+
+# --- SSE: đẩy thay đổi của từng sự kiện tới các bảng đang mở ---
+# Khai báo trước "/{event_id}" để "/stream" không bị hiểu là event_id
+@router.get("/stream")
+async def stream_event_updates(
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user = Depends(security.get_user_from_cookie)
+):
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    # Kết nối SSE sống rất lâu -> trả connection về pool ngay, không giữ session suốt thời gian stream
+    await db.close()
+
+    queue = event_broadcaster.subscribe()
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {CHANNEL}\ndata: {payload}\n\n"
+        finally:
+            event_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # --- EVENT ENDPOINTS (Admin Create) ---
 
 # xem su kien by id
 @router.get("/{event_id}", response_model=schemas.EventResponse)
-def read_event(event_id: int, db: Session = Depends(database.get_db), current_user = Depends(security.get_user_from_cookie)):
+def read_event(event_id: int, request: Request, response: Response, db: Session = Depends(database.get_db), current_user = Depends(security.get_user_from_cookie)):
+    # Kiểm tra ETag trước khi query: dữ liệu chưa đổi -> 304, chỉ tốn một câu tra data_versions
+    version, last_modified = current_version(db)
+    etag = make_etag("event", event_id, version)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
     event = db\
         .query(models.Event)\
         .options(joinedload(models.Event.participants))\
@@ -40,16 +83,41 @@ def read_event(event_id: int, db: Session = Depends(database.get_db), current_us
         .first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
+    apply_cache_headers(response, etag, last_modified)
     return event
 
 @router.get("", response_model=list[schemas.EventResponse])
-def read_events(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), current_user = Depends(security.get_user_from_cookie)):
-    events = db\
-        .query(models.Event)\
-        .options(joinedload(models.Event.participants))\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+def read_events(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor trang kế tiếp (lấy từ header X-Next-Cursor)"),
+    db: Session = Depends(database.get_db),
+    current_user = Depends(security.get_user_from_cookie)
+):
+    version, last_modified = current_version(db)
+    etag = make_etag("events", skip, limit, after or "", version)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Phân trang trên bảng events trước (keyset theo event_id), sau đó mới nạp participants
+    # bằng selectinload (1 câu IN riêng) -> LIMIT không bị cắt bởi các dòng join
+    query = db.query(models.Event).options(selectinload(models.Event.participants)).order_by(models.Event.event_id)
+    if after:
+        query = query.filter(models.Event.event_id > decode_id_cursor(after))
+    elif skip:
+        # Giữ tương thích với client cũ dùng skip
+        query = query.offset(skip)
+    events = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].event_id)
+
+    apply_cache_headers(response, etag, last_modified)
+    set_next_cursor(request, response, next_cursor)
     return events
 
 @router.get("/partials/events_table")
@@ -77,12 +145,30 @@ def create_event(
         db.add(new_event)
         db.commit()
         db.refresh(new_event)
+        dashboard_stats.invalidate()
+        event_broadcaster.publish_sync(db, new_event.event_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error creating event: " + str(e))
     
     return new_event
 
+# import lich ca hoc ky tu file CSV/JSON (dry_run=true: chi kiem tra, khong ghi DB)
+@router.post("/import")
+async def import_events_by_admin(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+):
+    if not isinstance(current_user, models.User):
+        return current_user
+
+    try:
+        return await import_events(db, file, dry_run=dry_run)
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # cap nhat su kien
 @router.put("/{event_id}/", response_model=schemas.EventResponse)
 def update_event(
@@ -102,6 +188,8 @@ def update_event(
         db.add(event)
         db.commit()
         db.refresh(event)
+        dashboard_stats.invalidate()
+        event_broadcaster.publish_sync(db, event_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error updating event: " + str(e))
@@ -124,6 +212,8 @@ def delete_event(
     try:
         db.add(event)
         db.commit()
+        dashboard_stats.invalidate()
+        event_broadcaster.publish_sync(db, event_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error deleting event: " + str(e))
@@ -132,11 +222,23 @@ def delete_event(
 
 
 # --- USER-EVENT ACTION (User tham gia sự kiện) ---
+# Các route join/leave/attend được gọi liên tục từ bảng sự kiện -> dùng async session để không chặn event loop
+async def get_event_and_link(db: AsyncSession, event_id: int, user_id: int):
+    event = await db.get(models.Event, event_id)
+    link = None
+    if event:
+        result = await db.execute(select(models.UserEvent).where(
+            models.UserEvent.user_id == user_id,
+            models.UserEvent.event_id == event_id
+        ))
+        link = result.scalars().first()
+    return event, link
+
 @router.post("/{event_id}/join/")
-def join_event(
+async def join_event(
     event_id: int,
     role: str = Form(...),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     current_user: models.User = Depends(security.get_user_from_cookie)
 ):
     
@@ -151,7 +253,7 @@ def join_event(
         raise HTTPException(status_code=400, detail="Vai trò không hợp lệ (chỉ chấp nhận: instructor, teaching_assistant)")
     
     # 1. Check event tồn tại
-    event = db.query(models.Event).filter(models.Event.event_id == event_id).first()
+    event, existing_link = await get_event_and_link(db, event_id, current_user.user_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -164,42 +266,40 @@ def join_event(
         raise HTTPException(status_code=400, detail="Event is locked. Cannot join at this time.")
     
     # 2. Check đã tham gia chưa
-    existing_link = db.query(models.UserEvent).filter(
-        models.UserEvent.user_id == current_user.user_id,
-        models.UserEvent.event_id == event_id
-    ).first()
     if existing_link:
         raise HTTPException(status_code=400, detail="User already joined this event")
     
-    # kiem tra so luong nguoi tham gia du thi khoa event
-    participant_count = db.query(models.UserEvent).filter(
-        models.UserEvent.event_id == event_id
-    ).count()
-    
-    if participant_count >= event.max_user_joined:
-        raise HTTPException(status_code=400, detail="Event has reached maximum number of participants")
+    # Giữ chỗ trong giới hạn của vai trò (và tổng số người) bằng một câu UPDATE có điều kiện.
+    # Hai người bấm cùng lúc vào chỗ cuối cùng: chỉ một UPDATE trả về dòng, người còn lại nhận lỗi.
+    reserved = (await db.execute(
+        reserve_seats(event_id, role_enum, check_total=True, only_open=True)
+    )).first()
+    if reserved is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Event has reached maximum number of participants for this role")
 
-    # 3. Tạo link
+    # 3. Tạo link (cùng transaction với bộ đếm -> lỗi thì rollback cả hai)
     user_event = models.UserEvent(user_id=current_user.user_id, event_id=event_id, role=role_enum)
     
     try:
         db.add(user_event)
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Error joining event: " + str(e))
     
-    return Response(status_code=200, headers={"HX-Trigger": "event_updated"})
+    await event_broadcaster.publish(db, event_id)
+    return Response(status_code=200, headers={"HX-Trigger": hx_event_updated(event_id)})
 
 # huy tham gia
 @router.post("/{event_id}/leave/")
-def leave_event(
+async def leave_event(
     event_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     current_user: models.User = Depends(security.get_user_from_cookie)
 ):
     # 1. Check event tồn tại
-    event = db.query(models.Event).filter(models.Event.event_id == event_id).first()
+    event, existing_link = await get_event_and_link(db, event_id, current_user.user_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -212,10 +312,6 @@ def leave_event(
         raise HTTPException(status_code=400, detail="Event is locked. Cannot leave at this time.")
     
     # 2. Check đã tham gia chưa
-    existing_link = db.query(models.UserEvent).filter(
-        models.UserEvent.user_id == current_user.user_id,
-        models.UserEvent.event_id == event_id
-    ).first()
     if not existing_link:
         raise HTTPException(status_code=400, detail="User has not joined this event")
     
@@ -223,33 +319,31 @@ def leave_event(
     if existing_link.status == "attended":
         raise HTTPException(status_code=400, detail="Cannot leave an event that has been attended")
     
-    # 3. Xoá link
+    # 3. Xoá link và trả lại chỗ cho vai trò tương ứng
     try:
-        db.delete(existing_link)
-        db.commit()
+        await db.delete(existing_link)
+        await db.execute(release_seats(event_id, existing_link.role))
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Error leaving event: " + str(e))
     
-    return Response(status_code=200, headers={"HX-Trigger": "event_updated"})
+    await event_broadcaster.publish(db, event_id)
+    return Response(status_code=200, headers={"HX-Trigger": hx_event_updated(event_id)})
 
 # danh dau da tham gia
 @router.post("/{event_id}/attend/")
-def attend_event(
+async def attend_event(
     event_id: int,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     current_user: models.User = Depends(security.get_user_from_cookie)
 ):
     # 1. Check event tồn tại
-    event = db.query(models.Event).filter(models.Event.event_id == event_id).first()
+    event, existing_link = await get_event_and_link(db, event_id, current_user.user_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # 2. Check đã tham gia chưa
-    existing_link = db.query(models.UserEvent).filter(
-        models.UserEvent.user_id == current_user.user_id,
-        models.UserEvent.event_id == event_id
-    ).first()
     if not existing_link:
         raise HTTPException(status_code=400, detail="User has not joined this event")
     
@@ -259,7 +353,7 @@ def attend_event(
     # Lấy giờ, phút kết thúc dựa trên end_period của event
     # (Giả sử bạn đã đổi tên trường to_time -> end_period trong models.py như hướng dẫn trước)
     # Nếu chưa đổi trong DB thì thay event.end_period bằng event.to_time (nếu to_time đang lưu số tiết)
-    end_hour, end_minute = PERIOD_END_TIMES.get(event.end_period, (23, 59))
+    end_hour, end_minute = PERIOD_END_TIMES.get(event.end_period, DEFAULT_END_TIME)
     
     event_end_time = datetime.combine(event.day_start, time(hour=end_hour, minute=end_minute))   
      
@@ -268,10 +362,10 @@ def attend_event(
     
     # 3. Cập nhật trạng thái tham gia
     existing_link.status = "attended"
-    db.add(existing_link)
-    db.commit()
+    await db.commit()
     
-    return Response(status_code=200, headers={"HX-Trigger": "event_updated"})
+    await event_broadcaster.publish(db, event_id)
+    return Response(status_code=200, headers={"HX-Trigger": hx_event_updated(event_id)})
 
 @router.post("/{event_id}/lock")
 async def lock_event(
@@ -286,9 +380,10 @@ async def lock_event(
     
     event.is_locked = True
     db.commit()
+    event_broadcaster.publish_sync(db, event_id)
     
-    # Gửi tín hiệu để HTMX refresh lại bảng
-    response.headers["HX-Trigger"] = "event_updated"
+    # Gửi tín hiệu để HTMX tải lại đúng dòng của sự kiện
+    response.headers["HX-Trigger"] = hx_event_updated(event_id)
     return {"message": "Đã khóa sự kiện"}
 
 # --- 2. API Mở khóa sự kiện ---
@@ -305,6 +400,7 @@ async def unlock_event(
     
     event.is_locked = False
     db.commit()
+    event_broadcaster.publish_sync(db, event_id)
     
-    response.headers["HX-Trigger"] = "event_updated"
+    response.headers["HX-Trigger"] = hx_event_updated(event_id)
     return {"message": "Đã mở khóa sự kiện"}
\ No newline at end of file
@@ -4,6 +4,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 import models, schemas, database
 import helpers.security as security
+from helpers.user_cache import user_cache
 
 router = APIRouter(
     prefix="/api/users",
@@ -34,15 +35,16 @@ async def change_password(
     db: Session = Depends(database.get_db)
 ):
     # 1. Kiểm tra mật khẩu hiện tại
-    if not security.verify_password(password_data.current_password, current_user.hashed_password):
+    if not await security.verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
     
-    # 2. Cập nhật mật khẩu mới
-    current_user.hashed_password = security.get_password_hash(password_data.new_password)
-    db.add(current_user)
+    # 2. Cập nhật mật khẩu mới (query lại user trong session của route, vì current_user thuộc session khác)
+    user = db.query(models.User).filter(models.User.user_id == current_user.user_id).first()
+    user.hashed_password = await security.get_password_hash_async(password_data.new_password)
     db.commit()
+    user_cache.invalidate_user(user.user_id)
     
     return {"message": "Password changed successfully"}
\ No newline at end of file
@@ -1,10 +1,9 @@
 # husc-ai-robotics/routers/pages/admin.py
 
-from fastapi import APIRouter, Request, Depends, Form, status, HTTPException, Query
+from fastapi import APIRouter, Request, Depends, Form, status, HTTPException, Query, UploadFile, File
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from helpers.templating import templates
 from sqlalchemy.orm import Session
-from pathlib import Path
 from typing import Annotated, Optional
 from pydantic import ValidationError
 
@@ -12,12 +11,16 @@ import database
 import models
 import schemas
 import helpers.security as security
+from helpers.user_cache import user_cache
+from helpers.event_broadcast import event_broadcaster
+from helpers.dashboard_stats import dashboard_stats
+from helpers.user_search import ensure_search_index, search_clauses
+from helpers.bulk_import import import_users, ImportFileError
 
-from sqlalchemy import or_
+from sqlalchemy import or_, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from math import ceil
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 router = APIRouter(
     prefix="/admin",
@@ -83,7 +86,7 @@ async def create_user_action(
         # Tạo User
         new_user = models.User(
             email=user_data.email,
-            hashed_password=security.get_password_hash(user_data.password),
+            hashed_password=await security.get_password_hash_async(user_data.password),
             full_name=user_data.full_name,
             phone=user_data.phone,
             role=user_data.role,
@@ -91,6 +94,7 @@ async def create_user_action(
         )
         db.add(new_user)
         db.commit()
+        dashboard_stats.invalidate()
         
         return templates.TemplateResponse(
             "pages/admin/create_user.html",
@@ -152,36 +156,72 @@ async def create_user_action(
             }
         )
         
+# --- Import hàng loạt tài khoản từ file CSV/XLSX ---
+@router.get("/users/import")
+async def get_import_users_page(
+    request: Request,
+    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+):
+    if not isinstance(current_user, models.User):
+        return current_user
+
+    return templates.TemplateResponse(
+        "pages/admin/import_users.html",
+        {"request": request, "user": current_user, "error": None, "report": None}
+    )
+
+@router.post("/users/import")
+async def import_users_action(
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+):
+    if not isinstance(current_user, models.User):
+        return current_user
+
+    error = None
+    report = None
+    try:
+        report = await import_users(db, file, created_by=current_user.user_id)
+    except ImportFileError as e:
+        error = str(e)
+
+    return templates.TemplateResponse(
+        "pages/admin/import_users.html",
+        {"request": request, "user": current_user, "error": error, "report": report}
+    )
+
 # --- [MỚI] 1. Trang danh sách User (Có Search + Pagination) ---
 @router.get("/users")
 async def list_users(
     request: Request,
     search: str = Query(None),
     page: int = Query(1, ge=1),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     current_user: models.User = Depends(security.get_current_admin_from_cookie)
 ):
     if not isinstance(current_user, models.User):
         return current_user
 
     LIMIT = 100
-    query = db.query(models.User).filter(models.User.is_deleted == False)
+    query = select(models.User).where(models.User.is_deleted == False)
 
-    # Logic Tìm kiếm
+    # Logic Tìm kiếm (không dấu, có index, xếp theo độ liên quan)
+    order_by = [models.User.user_id.desc()]
     if search:
-        query = query.filter(
-            or_(
-                models.User.email.ilike(f"%{search}%"),
-                models.User.full_name.ilike(f"%{search}%")
-            )
-        )
+        await ensure_search_index(db)
+        conditions, rank_order = search_clauses(search)
+        query = query.where(*conditions)
+        order_by = rank_order or order_by
 
     # Logic Phân trang
-    total_users = query.count()
+    total_users = await db.scalar(select(func.count()).select_from(query.subquery()))
     total_pages = ceil(total_users / LIMIT)
     offset = (page - 1) * LIMIT
     
-    users = query.order_by(models.User.user_id.desc()).offset(offset).limit(LIMIT).all()
+    result = await db.execute(query.order_by(*order_by).offset(offset).limit(LIMIT))
+    users = result.scalars().all()
 
     context = {
         "request": request,
@@ -285,6 +325,7 @@ async def edit_user_action(
 
         # --- CẬP NHẬT DỮ LIỆU ---
         
+        name_changed = target_user.full_name != full_name
         target_user.full_name = full_name
         target_user.role = role
         target_user.status = True if user_status else False # Checkbox logic
@@ -293,9 +334,13 @@ async def edit_user_action(
         if password and len(password.strip()) > 0:
             if len(password) < 8:
                 return render_page_with_error("Mật khẩu mới phải có ít nhất 8 ký tự.")
-            target_user.hashed_password = security.get_password_hash(password)
+            target_user.hashed_password = await security.get_password_hash_async(password)
 
         db.commit()
+        user_cache.invalidate_user(target_user.user_id)
+        # Tên hiện trên bảng sự kiện -> báo các bảng đang mở tải lại
+        if name_changed:
+            event_broadcaster.publish_table_changed_sync(db)
         
         # Thành công -> Redirect về danh sách
         return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
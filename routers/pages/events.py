@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Request, Depends, Form, status, HTTPException, Query
+from fastapi import APIRouter, Request, Depends, Form, status, HTTPException, Query, UploadFile, File
 from fastapi.responses import RedirectResponse, Response, HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import func, not_
-from sqlalchemy.orm import Session
-from pathlib import Path
+from helpers.templating import templates
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import IntegrityError
 from typing import Annotated, Optional, List
 from datetime import date
 import database
@@ -15,11 +15,15 @@ from routers.api.events import PERIOD_START_TIMES, PERIOD_END_TIMES
 from fastapi.responses import HTMLResponse
 from models import User, Event, UserEvent, EventRole
 from helpers.security import get_current_admin_from_cookie
+from helpers.bulk_import import import_events, ImportFileError
+from helpers.capacity import reserve_seats, release_seats, role_cap, role_count
+from helpers.dashboard_stats import dashboard_stats
+from helpers.event_broadcast import event_broadcaster
+from helpers.user_search import ensure_search_index_sync, search_clauses
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 # Định nghĩa đường dẫn tới thư mục templates
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 router = APIRouter(
     prefix="/events",
@@ -82,6 +86,8 @@ async def create_event_action(
         db.add(new_event)
         db.commit()
         db.refresh(new_event)
+        dashboard_stats.invalidate()
+        event_broadcaster.publish_sync(db, new_event.event_id)
         
         # Thành công: Redirect về trang danh sách sự kiện (hoặc trang chi tiết)
         # 303 See Other là chuẩn cho redirect sau khi POST
@@ -109,6 +115,43 @@ async def create_event_action(
             }
         )
         
+# 2b. Import lịch cả học kỳ từ file CSV/JSON (Chỉ Admin)
+@router.get("/import")
+async def get_event_import_page(
+    request: Request,
+    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+):
+    if not isinstance(current_user, models.User):
+        return current_user
+
+    return templates.TemplateResponse(
+        "pages/import_events.html",
+        {"request": request, "user": current_user, "error": None, "report": None}
+    )
+
+@router.post("/import")
+async def import_events_action(
+    request: Request,
+    file: UploadFile = File(...),
+    dry_run: Annotated[bool, Form()] = False,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: models.User = Depends(security.get_current_admin_from_cookie)
+):
+    if not isinstance(current_user, models.User):
+        return current_user
+
+    error = None
+    report = None
+    try:
+        report = await import_events(db, file, dry_run=dry_run)
+    except ImportFileError as e:
+        error = str(e)
+
+    return templates.TemplateResponse(
+        "pages/import_events.html",
+        {"request": request, "user": current_user, "error": error, "report": report}
+    )
+
 # 3. GET: Hiển thị trang cập nhật sự kiện
 @router.get("/{event_id}/edit")
 async def get_event_edit_page(
@@ -194,6 +237,8 @@ async def update_event_action(
         
         db.commit()
         db.refresh(event)
+        dashboard_stats.invalidate()
+        event_broadcaster.publish_sync(db, event_id)
         
         # Redirect về trang chủ hoặc trang chi tiết
         return RedirectResponse(url="/events", status_code=status.HTTP_303_SEE_OTHER)
@@ -239,9 +284,9 @@ async def get_event_participants_manager(
     if not event:
         return Response(content="Event not found", status_code=404)
 
-    # Lấy danh sách Instructor và TA
-    instructors = db.query(UserEvent).filter(UserEvent.event_id == event_id, UserEvent.role == 'instructor').all()
-    tas = db.query(UserEvent).filter(UserEvent.event_id == event_id, UserEvent.role == 'teaching_assistant').all()
+    # Lấy danh sách Instructor và TA (template đọc p.user từng dòng -> join sẵn user, tránh N+1)
+    instructors = db.query(UserEvent).options(joinedload(UserEvent.user)).filter(UserEvent.event_id == event_id, UserEvent.role == 'instructor').all()
+    tas = db.query(UserEvent).options(joinedload(UserEvent.user)).filter(UserEvent.event_id == event_id, UserEvent.role == 'teaching_assistant').all()
 
     return templates.TemplateResponse("partials/event_participants_manager.html", {
         "request": request,
@@ -269,8 +314,13 @@ async def remove_participant(
     if current_user.role != schemas.UserRole.ADMIN.value:
         return Response(status_code=403)
         
-    db.query(UserEvent).filter(UserEvent.event_id == event_id, UserEvent.user_id == user_id).delete()
-    db.commit()
+    link = db.query(UserEvent).filter(UserEvent.event_id == event_id, UserEvent.user_id == user_id).first()
+    if link:
+        # Xóa link và trả lại chỗ trong cùng transaction
+        db.delete(link)
+        db.execute(release_seats(event_id, link.role))
+        db.commit()
+        event_broadcaster.publish_sync(db, event_id)
     
     # [QUAN TRỌNG] Xóa cache của SQLAlchemy session để lần query tiếp theo lấy data mới nhất
     db.expire_all()
@@ -292,28 +342,38 @@ async def get_candidate_users(
     if current_user.role != schemas.UserRole.ADMIN.value: return Response(status_code=403)
     
     limit = 10
+    page = max(page, 1)
     skip = (page - 1) * limit
 
-    # Lấy danh sách ID đã tham gia
-    # joined_ids = db.query(UserEvent.user_id).filter(UserEvent.event_id == event_id).subquery()
-
-    # [ĐÚNG - Sửa lại như sau]
-    # Xóa .subquery(), để nguyên câu query. SQLAlchemy sẽ tự động biên dịch nó thành sub-select chuẩn.
-    joined_ids = db.query(models.UserEvent.user_id).filter(models.UserEvent.event_id == event_id)
-    
-    # Query user chưa tham gia
+    # User chưa tham gia: anti-join NOT EXISTS, mỗi user chỉ cần tra khóa chính (event_id, user_id) của user_event
+    already_joined = (
+        select(models.UserEvent.user_id)
+        .where(
+            models.UserEvent.event_id == event_id,
+            models.UserEvent.user_id == models.User.user_id,
+        )
+        .exists()
+    )
     query = db.query(models.User).filter(
-        not_(models.User.user_id.in_(joined_ids)), 
+        ~already_joined,
         models.User.is_deleted == False
     )
 
+    # Tìm không dấu ("nguyen" ra "Nguyễn"), kết quả liên quan nhất lên đầu
+    order_by = [models.User.user_id]
     if q:
-        search = f"%{q}%"
-        query = query.filter(User.full_name.ilike(search) | User.email.ilike(search))
-
-    total = query.count()
-    users = query.offset(skip).limit(limit).all()
-    total_pages = (total + limit - 1) // limit
+        ensure_search_index_sync(db)
+        conditions, rank_order = search_clauses(q)
+        query = query.filter(*conditions)
+        order_by = rank_order or order_by
+
+    # Không đếm tổng (COUNT quét cả bảng users mỗi lần gõ phím/lật trang):
+    # lấy dư 1 dòng để biết còn trang sau hay không
+    users = query.order_by(*order_by).offset(skip).limit(limit + 1).all()
+    has_next = len(users) > limit
+    users = users[:limit]
+    # Template chỉ cần total_pages để vẽ nút: hiện tới trang kế tiếp nếu còn dữ liệu
+    total_pages = page + 1 if has_next else page
 
     return templates.TemplateResponse("partials/modal_select_users.html", {
         "request": request,
@@ -338,16 +398,21 @@ async def add_participants(
     if current_user.role != schemas.UserRole.ADMIN.value: return Response(status_code=403)
 
     event = db.query(Event).filter(Event.event_id == event_id).first()
-    
-    # Kiểm tra số lượng
-    current_count = db.query(UserEvent).filter(UserEvent.event_id == event_id, UserEvent.role == role).count()
-    
-    max_allowed = event.max_instructor if role == 'instructor' else event.max_teaching_assistant
-    # Handle trường hợp max_instructor có thể là None (nếu model cho phép) hoặc 0
-    max_allowed = max_allowed if max_allowed is not None else 999 
-
-    # Nếu vượt quá giới hạn -> Trả về lỗi vào div #form-errors (Không đóng modal)
-    if current_count + len(user_ids) > max_allowed:
+    if not event:
+        return Response(status_code=404)
+    if role not in (schemas.EventRole.INSTRUCTOR.value, schemas.EventRole.TA.value):
+        return Response(status_code=400)
+
+    # Giữ đủ len(user_ids) chỗ bằng một câu UPDATE có điều kiện: giới hạn của vai trò và tổng số người
+    # (giống API join_event). Không trả về dòng nào = vượt giới hạn -> trả về lỗi vào div #form-errors (Không đóng modal)
+    reserved = db.execute(reserve_seats(event_id, role, seats=len(user_ids), check_total=True)).first()
+    if reserved is None:
+        db.rollback()
+        current_count = role_count(event, role)
+        max_allowed = role_cap(event, role)
+        if current_count + len(user_ids) <= max_allowed:
+            current_count = event.instructor_count + event.teaching_assistant_count
+            max_allowed = event.max_user_joined
         error_msg = f"Đã chọn {len(user_ids)} người. Tổng sẽ là {current_count + len(user_ids)}, vượt quá giới hạn ({max_allowed}). Vui lòng bỏ bớt."
         return Response(
             content=f"""
@@ -364,17 +429,31 @@ async def add_participants(
         new_member = UserEvent(event_id=event_id, user_id=uid, role=role, status="registered")
         db.add(new_member)
     
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Có user đã được thêm từ request khác -> rollback cả bộ đếm
+        db.rollback()
+        return Response(
+            content="""
+            <div class="alert alert-danger d-flex align-items-center mb-0">
+                <i class="bi bi-exclamation-triangle-fill me-2"></i>
+                <div>Một số người đã có trong sự kiện. Vui lòng tải lại danh sách.</div>
+            </div>
+            """,
+            media_type="text/html"
+        )
+    event_broadcaster.publish_sync(db, event_id)
     
     # [QUAN TRỌNG] Làm mới session
     db.expire_all()
     
     # 3. Chuẩn bị dữ liệu để render lại danh sách quản lý (Modal 1)
-    instructors = db.query(models.UserEvent).filter(models.UserEvent.event_id == event_id, models.UserEvent.role == 'instructor').all()
-    tas = db.query(models.UserEvent).filter(models.UserEvent.event_id == event_id, models.UserEvent.role == 'teaching_assistant').all()
+    instructors = db.query(models.UserEvent).options(joinedload(models.UserEvent.user)).filter(models.UserEvent.event_id == event_id, models.UserEvent.role == 'instructor').all()
+    tas = db.query(models.UserEvent).options(joinedload(models.UserEvent.user)).filter(models.UserEvent.event_id == event_id, models.UserEvent.role == 'teaching_assistant').all()
 
     # Render template Modal 1 (Manager)
-    # Lưu ý: 'templates' phải là biến Jinja2Templates đã khai báo ở đầu file
+    # 'templates' là Jinja2Templates dùng chung (helpers/templating.py)
     manager_html = templates.get_template("partials/event_participants_manager.html").render({
         "request": request,
         "event": event,
@@ -1,20 +1,27 @@
 from fastapi import APIRouter, Query
-from typing import Annotated
+from fastapi.responses import HTMLResponse
+from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 import models, schemas, database
 import helpers.security as security
 from schemas import EventRole
 from datetime import datetime, date, time
-from pathlib import Path
-from fastapi.templating import Jinja2Templates
+from bisect import bisect_left, bisect_right
+from helpers.templating import templates
 from zoneinfo import ZoneInfo
 from typing import List 
 import models # Đảm bảo đã import models
-from utils.constants import PERIOD_START_TIMES, PERIOD_END_TIMES
+from utils.constants import PERIOD_START_TIMES, PERIOD_END_TIMES, DEFAULT_START_TIME, DEFAULT_END_TIME
+from utils.time_utils import now_vn, VN_TZ
+from helpers.pagination import encode_cursor, decode_datetime_cursor
+from helpers.capacity import role_cap, role_count
+from helpers.fragment_cache import events_table_cache
+from helpers.data_version import current_version_async
+from helpers.http_cache import make_etag, is_not_modified, not_modified, cache_headers
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 def get_vietnamese_weekday(d: date) -> str:
     weekdays = ["Thứ 2", "Thứ 3", "Thứ 4", "Thứ 5", "Thứ 6", "Thứ 7", "CN"]
@@ -46,11 +53,159 @@ router = APIRouter(
     tags=["partials"],
 )
 
+PAGE_SIZE = 50
+
+def build_tab_query(tab: str, now: datetime):
+    """
+    Trả về (câu select, cột sắp xếp, giảm dần?) cho từng tab.
+    Toàn bộ điều kiện lọc + sắp xếp chạy bằng SQL trên start_at/end_at (đã đánh index).
+    """
+    query = select(models.Event).where(models.EVENT_NOT_DELETED)
+
+    if tab == "ongoing":
+        # Đang diễn ra: Đã bắt đầu nhưng chưa kết thúc
+        query = query.where(models.Event.start_at <= now, models.Event.end_at >= now)
+        return query, models.Event.start_at, False
+    if tab == "finished":
+        # Đã kết thúc: sự kiện mới nhất (vừa xong) lên đầu
+        query = query.where(models.Event.end_at < now)
+        return query, models.Event.end_at, True
+
+    # Sắp diễn ra: sự kiện gần nhất lên đầu
+    query = query.where(models.Event.start_at > now)
+    return query, models.Event.start_at, False
+
+def apply_keyset(query, sort_col, descending: bool, after: str | None):
+    """Keyset pagination theo (sort_col, event_id): không dùng OFFSET nên trang sau cũng rẻ như trang đầu."""
+    if after:
+        cursor_ts, cursor_id = decode_datetime_cursor(after)
+        if descending:
+            query = query.where(or_(
+                sort_col < cursor_ts,
+                and_(sort_col == cursor_ts, models.Event.event_id < cursor_id)
+            ))
+        else:
+            query = query.where(or_(
+                sort_col > cursor_ts,
+                and_(sort_col == cursor_ts, models.Event.event_id > cursor_id)
+            ))
+
+    if descending:
+        return query.order_by(sort_col.desc(), models.Event.event_id.desc())
+    return query.order_by(sort_col.asc(), models.Event.event_id.asc())
+
+def build_shared_event_view(event: models.Event, now: datetime) -> dict:
+    """Phần giống nhau với mọi user của một dòng (được cache theo data_version)."""
+    list_instructors = []
+    list_tas = []
+    
+    # --- [LOGIC MỚI AN TOÀN] ---
+    if event.participants:
+        for p in event.participants:
+            if not p.role: continue
+            
+            # Chuẩn hóa về chữ thường để so sánh
+            r = p.role.lower().strip() 
+            
+            # Check Instructor (Chấp nhận nhiều biến thể)
+            if r in ['instructor', 'gv', 'giang_vien']:
+                list_instructors.append(p)
+            
+            # Check TA (Chấp nhận cả 'ta' cũ và 'teaching_assistant' mới)
+            elif r in ['ta', 'teaching_assistant', 'tro_giang']:
+                list_tas.append(p)
+    # ---------------------------
+    
+    # Lấy tên để hiển thị (như cũ)
+    instructor_names = [p.user.full_name for p in list_instructors if p.user]
+    ta_names = [p.user.full_name for p in list_tas if p.user]
+    
+    # 2. Vai trò/trạng thái của từng người tham gia -> apply_viewer() tra theo user hiện tại
+    participants = {p.user_id: (p.role, p.status) for p in event.participants}
+    
+    # 3. Tính toán Logic từng vai trò (dùng bộ đếm trên Event, cùng giới hạn với câu UPDATE giữ chỗ)
+    # Instructor
+    count_instructor = role_count(event, EventRole.INSTRUCTOR.value)
+    is_instructor_full = count_instructor >= role_cap(event, EventRole.INSTRUCTOR.value) # Default 1 nếu None
+    
+    # TA
+    count_ta = role_count(event, EventRole.TA.value)
+    is_ta_full = count_ta >= role_cap(event, EventRole.TA.value) # Default 0 nếu None
+
+    # Logic thời gian
+    is_ended = now > event.end_at
+    
+    # [THÊM] Tính thứ
+    day_name_str = get_vietnamese_weekday(event.day_start)
+    
+    return {
+        "event_id": event.event_id,
+        "day_str": event.day_start.strftime("%d/%m/%Y"),
+        "day_str_month_year": event.day_start.strftime("%m/%Y"), # Thêm trường này cho template
+        "time_str": f"{format_period_start_time(event.start_period)} - {format_period_end_time(event.end_period)}",
+        "period_detail": f"(Tiết {event.start_period}-{event.end_period})",
+        "school_name": event.school_name,
+        "name": event.name,
+        "student_count": event.number_of_student,
+        
+        # Thông tin hiển thị cột phân công
+        "instructors": ", ".join(instructor_names) if instructor_names else "---",
+        "tas": ", ".join(ta_names) if ta_names else "---",
+        "participants": participants,
+        
+        "is_ended": is_ended,
+        "is_locked": event.is_locked,
+        "status": event.status,
+        
+        # Logic riêng cho từng role
+        "max_instructor": event.max_instructor,
+        "curr_instructor": count_instructor,
+        "is_instructor_full": is_instructor_full,
+        
+        "max_ta": event.max_teaching_assistant,
+        "curr_ta": count_ta,
+        "is_ta_full": is_ta_full,
+        
+        "day_name": day_name_str,
+    }
+
+def apply_viewer(shared_view: dict, current_user: models.User) -> dict:
+    """Ghép phần riêng của user hiện tại vào view dùng chung (không sửa dict trong cache)."""
+    current_participant = shared_view["participants"].get(current_user.user_id)
+    is_joined = current_participant is not None
+    return {
+        **shared_view,
+        # Thông tin logic hành động
+        "is_joined": is_joined,
+        "user_role": current_participant[0] if is_joined else None,          # 'instructor' hoặc 'teaching_assistant'
+        "attendance_status": current_participant[1] if is_joined else None,  # 'registered' hoặc 'attended'
+    }
+
+def build_event_view(event: models.Event, current_user: models.User, now: datetime) -> dict:
+    return apply_viewer(build_shared_event_view(event, now), current_user)
+
+# start_at/end_at luôn rơi vào giờ bắt đầu/kết thúc của một tiết (hoặc mốc mặc định, xem get_event_times)
+# -> giữa hai mốc liên tiếp, tab của mọi sự kiện và trạng thái "đã kết thúc" không đổi.
+START_TIMES = sorted({time(h, m) for h, m in (*PERIOD_START_TIMES.values(), DEFAULT_START_TIME)})
+END_TIMES = sorted({time(h, m) for h, m in (*PERIOD_END_TIMES.values(), DEFAULT_END_TIME)})
+
+def time_bucket(now: datetime) -> tuple[str, datetime]:
+    """
+    (khóa của khoảng thời gian chứa now, thời điểm khoảng đó bắt đầu).
+    Cùng khóa + cùng data_version -> bảng sự kiện giống hệt nhau, không cần query để biết.
+    """
+    current = now.time()
+    started = bisect_right(START_TIMES, current)  # số mốc start_at <= now (đã bắt đầu)
+    ended = bisect_left(END_TIMES, current)       # số mốc end_at < now (đã kết thúc)
+    since = max([time(0, 0), *START_TIMES[:started], *END_TIMES[:ended]])
+    return f"{now.date().isoformat()}.{started}.{ended}", datetime.combine(now.date(), since)
+
 @router.get("/events-table")
 async def render_events_table(
     request: Request,
     tab: str = Query("upcoming", enum=["upcoming", "ongoing", "finished"]),
-    db: Session = Depends(database.get_db), 
+    after: Optional[str] = Query(None, description="Cursor trang kế tiếp (infinite scroll)"),
+    db: AsyncSession = Depends(database.get_async_db), 
     current_user = Depends(security.get_user_from_cookie)
 ):
     if not current_user:
@@ -59,149 +214,85 @@ async def render_events_table(
             {"request": request, "events": [], "error": "Vui lòng đăng nhập để xem lịch."}
         )
 
-    # Lấy sự kiện chưa bị xóa
-    all_events = db.query(models.Event)\
-        .filter(models.Event.status != "deleted")\
-        .options(joinedload(models.Event.participants).joinedload(models.UserEvent.user))\
-        .order_by(models.Event.day_start)\
-        .limit(50)\
-        .all()
-
-    filtered_events: list[models.Event] = []
-    now = datetime.now(ZoneInfo("Asia/Ho_Chi_Minh")).replace(tzinfo=None)
-
-    # 2. Lọc sự kiện theo Tab
-    for event in all_events:
-        # Lấy giờ phút bắt đầu và kết thúc từ dict
-        start_h, start_m = PERIOD_START_TIMES.get(event.start_period, (7, 0))
-        end_h, end_m = PERIOD_END_TIMES.get(event.end_period, (23, 59))
-
-        # Tạo datetime đầy đủ
-        start_dt = datetime.combine(event.day_start, time(start_h, start_m))
-        end_dt = datetime.combine(event.day_start, time(end_h, end_m))
-        
-        # Gán tạm vào object để dùng cho việc sort bên dưới
-        event.real_start_dt = start_dt
-        event.real_end_dt = end_dt
-
-        # Logic phân loại
-        if tab == "upcoming":
-            # Sắp diễn ra: Thời gian bắt đầu > hiện tại
-            if start_dt > now:
-                filtered_events.append(event)
-        
-        elif tab == "ongoing":
-            # Đang diễn ra: Đã bắt đầu nhưng chưa kết thúc
-            if start_dt <= now <= end_dt:
-                filtered_events.append(event)
-        
-        elif tab == "finished":
-            # Đã kết thúc: Thời gian kết thúc < hiện tại
-            if end_dt < now:
-                filtered_events.append(event)
+    now = now_vn()
 
-    # 3. Sắp xếp danh sách
-    if tab == "finished":
-        # Sự kiện đã qua: Sự kiện mới nhất (vừa xong) lên đầu
-        filtered_events.sort(key=lambda x: x.real_end_dt, reverse=True)
-    else:
-        # Sắp diễn ra & Đang diễn ra: Sự kiện gần nhất (sắp tới) lên đầu
-        filtered_events.sort(key=lambda x: x.real_start_dt)
-
-    # Giới hạn số lượng hiển thị (ví dụ 50) để tránh quá tải view
-    filtered_events = filtered_events[:50]
-
-    events_view = []
-    for event in filtered_events:
-        list_instructors = []
-        list_tas = []
-        
-        # --- [LOGIC MỚI AN TOÀN] ---
-        if event.participants:
-            for p in event.participants:
-                if not p.role: continue
-                
-                # Chuẩn hóa về chữ thường để so sánh
-                r = p.role.lower().strip() 
-                
-                # Check Instructor (Chấp nhận nhiều biến thể)
-                if r in ['instructor', 'gv', 'giang_vien']:
-                    list_instructors.append(p)
-                
-                # Check TA (Chấp nhận cả 'ta' cũ và 'teaching_assistant' mới)
-                elif r in ['ta', 'teaching_assistant', 'tro_giang']:
-                    list_tas.append(p)
-        # ---------------------------
-        
-        # Lấy tên để hiển thị (như cũ)
-        instructor_names = [p.user.full_name for p in list_instructors if p.user]
-        ta_names = [p.user.full_name for p in list_tas if p.user]
-        
-        # 2. Tìm trạng thái của user hiện tại
-        current_participant = next((p for p in event.participants if p.user_id == current_user.user_id), None)
-        is_joined = current_participant is not None
-        user_role = current_participant.role if is_joined else None
-        attendance_status = current_participant.status if is_joined else None
-        
-        # 3. Tính toán Logic từng vai trò
-        # Instructor
-        count_instructor = len(list_instructors)
-        is_instructor_full = count_instructor >= (event.max_instructor or 1) # Default 1 nếu None
-        
-        # TA
-        count_ta = len(list_tas)
-        is_ta_full = count_ta >= (event.max_teaching_assistant or 0) # Default 0 nếu None
+    # Nội dung trang chỉ phụ thuộc (tab, cursor, data_version, khoảng thời gian) + người xem
+    # -> ETag tính được chỉ với một câu tra data_versions, kiểm tra trước cache và trước query
+    data_version, data_changed_at = await current_version_async(db)
+    bucket, bucket_started_at = time_bucket(now)
+    etag = make_etag("events-table", tab, after or "", data_version, bucket, current_user.user_id, current_user.role)
+    last_modified = max(data_changed_at, bucket_started_at.replace(tzinfo=VN_TZ))
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
 
-        # Logic thời gian
-        is_ended = now > event.real_end_dt
-        
-        # [THÊM] Tính thứ
-        day_name_str = get_vietnamese_weekday(event.day_start)
-        
-        events_view.append({
-            "event_id": event.event_id,
-            "day_str": event.day_start.strftime("%d/%m/%Y"),
-            "day_str_month_year": event.day_start.strftime("%m/%Y"), # Thêm trường này cho template
-            "time_str": f"{format_period_start_time(event.start_period)} - {format_period_end_time(event.end_period)}",
-            "period_detail": f"(Tiết {event.start_period}-{event.end_period})",
-            "school_name": event.school_name,
-            "name": event.name,
-            "student_count": event.number_of_student,
-            
-            # Thông tin hiển thị cột phân công
-            "instructors": ", ".join(instructor_names) if instructor_names else "---",
-            "tas": ", ".join(ta_names) if ta_names else "---",
-            
-            # Thông tin logic hành động
-            "is_joined": is_joined,
-            "user_role": user_role,              # 'instructor' hoặc 'teaching_assistant'
-            "attendance_status": attendance_status, # 'registered' hoặc 'attended'
-            
-            "is_ended": is_ended,
-            "is_locked": event.is_locked,
-            "status": event.status,
-            
-            # Logic riêng cho từng role
-            "max_instructor": event.max_instructor,
-            "curr_instructor": count_instructor,
-            "is_instructor_full": is_instructor_full,
-            
-            "max_ta": event.max_teaching_assistant,
-            "curr_ta": count_ta,
-            "is_ta_full": is_ta_full,
-            
-            "day_name": day_name_str,
-        })
-        
-    current_title = TAB_TITLES.get(tab, "Danh Sách Sự Kiện")
-
-    return templates.TemplateResponse(
-        "partials/events_table.html", 
-        {
-            "request": request, 
-            "events": events_view,
-            "user": current_user,
-            "current_tab": tab, 
-            "title": current_title
+    # Phần dùng chung của trang được cache theo cùng các thành phần đó (trừ người xem)
+    cache_key = events_table_cache.key(tab, after, data_version, bucket)
+    page = events_table_cache.get(cache_key)
+
+    if page is None:
+        # 1. Lọc theo tab + sắp xếp + cursor ngay trong SQL, lấy dư 1 dòng để biết còn trang sau không
+        query, sort_col, descending = build_tab_query(tab, now)
+        query = apply_keyset(query, sort_col, descending, after)
+        result = await db.execute(
+            query
+            .options(selectinload(models.Event.participants).selectinload(models.UserEvent.user))
+            .limit(PAGE_SIZE + 1)
+        )
+        page_events = result.scalars().all()
+
+        next_cursor = None
+        if len(page_events) > PAGE_SIZE:
+            page_events = page_events[:PAGE_SIZE]
+            last = page_events[-1]
+            next_cursor = encode_cursor(last.end_at if descending else last.start_at, last.event_id)
+
+        page = {
+            "rows": [build_shared_event_view(event, now) for event in page_events],
+            "next_cursor": next_cursor,
         }
-    )
\ No newline at end of file
+        events_table_cache.set(cache_key, page)
+
+    events_view = [apply_viewer(row, current_user) for row in page["rows"]]
+    next_cursor = page["next_cursor"]
+
+    context = {
+        "request": request, 
+        "events": events_view,
+        "user": current_user,
+        "current_tab": tab, 
+        "title": TAB_TITLES.get(tab, "Danh Sách Sự Kiện"),
+        "next_cursor": next_cursor
+    }
+
+    # Trang tiếp theo (infinite scroll) -> chỉ trả về các dòng <tr> để nối vào bảng
+    template_name = "partials/events_table_rows.html" if after else "partials/events_table.html"
+    return templates.TemplateResponse(template_name, context, headers=cache_headers(etag, last_modified))
+
+# Render lại đúng 1 dòng của bảng sự kiện (client gọi khi nhận thông báo event_updated qua SSE/HX-Trigger)
+@router.get("/events-table/rows/{event_id}")
+async def render_event_row(
+    request: Request,
+    event_id: int,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user = Depends(security.get_user_from_cookie)
+):
+    if not current_user:
+        return HTMLResponse(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    result = await db.execute(
+        select(models.Event)
+        .where(models.Event.event_id == event_id)
+        .options(selectinload(models.Event.participants).selectinload(models.UserEvent.user))
+    )
+    event = result.scalars().first()
+
+    # Sự kiện đã bị xóa -> trả về rỗng để dòng biến mất khỏi bảng
+    if not event or event.status == schemas.EventStatus.DELETED.value:
+        return HTMLResponse("")
+
+    return templates.TemplateResponse("partials/events_table_rows.html", {
+        "request": request,
+        "events": [build_event_view(event, current_user, now_vn())],
+        "user": current_user,
+        "next_cursor": None,
+    })
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Request, Depends, Form, status
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from helpers.templating import templates
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated, Optional
-from pathlib import Path
 import schemas
 
 import database
 import models
 import helpers.security as security
+from helpers.user_cache import user_cache
+from helpers.event_broadcast import event_broadcaster
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 router = APIRouter(
     tags=["pages_profile"]
@@ -48,13 +49,14 @@ async def update_profile(
     bank_number: str = Form(None), # Cho phép None
     password: str = Form(None),    # Cho phép None
     re_password: str = Form(None), # Cho phép None
-    db: Session = Depends(database.get_db),
-    current_user: models.User | None = Depends(security.get_user_from_cookie)
+    db: AsyncSession = Depends(database.get_async_db),
+    user: models.User | None = Depends(security.get_user_from_cookie)
 ):
-    if not current_user:
+    if not user:
         return RedirectResponse(url="/auth/signin", status_code=status.HTTP_302_FOUND)
     
-    user_phone = db.query(models.User).filter(models.User.phone == phone).first()
+    # User từ cookie thuộc session khác -> lấy lại bản ghi trong session của route để cập nhật
+    current_user = await db.get(models.User, user.user_id)
 
     error = None
     success = None
@@ -63,10 +65,11 @@ async def update_profile(
         # --- BƯỚC 1: KIỂM TRA SỐ ĐIỆN THOẠI TỒN TẠI ---
         # Chỉ kiểm tra nếu số điện thoại mới khác số điện thoại hiện tại
         if current_user.phone != phone:
-            existing_user = db.query(models.User).filter(
+            result = await db.execute(select(models.User).where(
                 models.User.phone == phone,
                 models.User.user_id != current_user.user_id # Loại trừ chính user đang update
-            ).first()
+            ))
+            existing_user = result.scalars().first()
 
             if existing_user:
                 error = "Số điện thoại này đã được sử dụng bởi một tài khoản khác."
@@ -74,6 +77,7 @@ async def update_profile(
         # Kiểm tra lỗi ở Bước 1 trước khi tiếp tục
         if error is None:
             # Cập nhật Họ tên
+            name_changed = current_user.full_name != full_name
             current_user.full_name = full_name
             current_user.phone = phone
             current_user.name_bank = name_bank
@@ -88,16 +92,20 @@ async def update_profile(
                     error = "Mật khẩu xác nhận không khớp."
                 else:
                     # Hash mật khẩu và lưu
-                    current_user.hashed_password = security.get_password_hash(password)
+                    current_user.hashed_password = await security.get_password_hash_async(password)
         
         if not error:
-            db.commit()
-            db.refresh(current_user)
+            await db.commit()
+            await db.refresh(current_user)
+            user_cache.invalidate_user(current_user.user_id)
+            # Tên hiện trong cột giảng viên/trợ giảng của bảng sự kiện -> báo các bảng đang mở tải lại
+            if name_changed:
+                await event_broadcaster.publish_table_changed(db)
             error = None
             success = "Cập nhật thông tin thành công!"
             
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         error = f"Đã xảy ra lỗi hệ thống: {str(e)}"
         
     # Render lại trang profile với thông báo
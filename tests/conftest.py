@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+# database.py đọc DATABASE_URL lúc import -> phải đặt trước khi import main/database/models.
+# Mỗi lần chạy test một file SQLite riêng; QUERY_AUDIT bật để test đọc được header X-Query-Count.
+_DB_DIR = tempfile.mkdtemp(prefix="husc-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ["QUERY_AUDIT"] = "1"
+
+import pytest
+from fastapi.testclient import TestClient
+
+import schemas
+from helpers.limiter import limiter
+from tests.factories import auth_cookies, create_users
+from utils.migrate import migrate
+
+
+@pytest.fixture(scope="session")
+def app():
+    # DB trống -> create_all + stamp head, giống bước migrate trước khi chạy worker
+    migrate()
+    import main
+
+    limiter.enabled = False
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def admin_client(app):
+    [email] = create_users("admin", 1, role=schemas.UserRole.ADMIN.value)
+    return TestClient(app, cookies=auth_cookies(email))
@@ -0,0 +1,63 @@
+"""Tạo dữ liệu test trực tiếp trong DB (nhanh hơn đi qua API) + client đã đăng nhập sẵn."""
+import itertools
+from datetime import timedelta
+
+import httpx
+from sqlalchemy import insert
+
+import database
+import models
+import schemas
+import helpers.security as security
+from utils.text_utils import build_user_search_text
+from utils.time_utils import now_vn
+
+_phone_numbers = itertools.count(1)
+
+
+def auth_cookies(email: str, token_version: int = 0) -> dict:
+    token = security.create_access_token(data={"sub": email, "v": token_version})
+    return {"access_token": f"Bearer {token}"}
+
+
+def async_client(app, email: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://testserver", cookies=auth_cookies(email)
+    )
+
+
+def create_users(prefix: str, count: int, role: str = schemas.UserRole.USER.value) -> list[str]:
+    """count user đã kích hoạt (Core insert, không qua ORM). Trả về email."""
+    password_hash = security.get_password_hash("password123")
+    rows = []
+    for i in range(count):
+        email, full_name, phone = f"{prefix}-{i}@husc.edu.vn", f"Test {prefix} {i}", f"09{next(_phone_numbers):08d}"
+        rows.append({
+            "email": email,
+            "full_name": full_name,
+            "phone": phone,
+            "hashed_password": password_hash,
+            "status": True,
+            "role": role,
+            "token_version": 0,
+            "is_deleted": False,
+            "search_text": build_user_search_text(full_name, email, phone),
+        })
+    with database.SessionLocal() as db:
+        db.execute(insert(models.User), rows)
+        db.commit()
+    return [row["email"] for row in rows]
+
+
+def create_event(days_from_now: int = 7, **fields) -> int:
+    day = now_vn().date() + timedelta(days=days_from_now)
+    values = dict(
+        name="Test event", day_start=day, start_period=1, end_period=4, school_name="THPT Test",
+        max_instructor=1, max_teaching_assistant=2, max_user_joined=3,
+    )
+    values.update(fields)
+    with database.SessionLocal() as db:
+        event = models.Event(**values)
+        db.add(event)
+        db.commit()
+        return event.event_id
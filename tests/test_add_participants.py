@@ -0,0 +1,31 @@
+from sqlalchemy import func, select
+
+import database
+import models
+from schemas import EventRole
+from tests.factories import create_event, create_users
+
+
+def user_ids(emails: list[str]) -> list[int]:
+    with database.SessionLocal() as db:
+        return list(db.scalars(select(models.User.user_id).where(models.User.email.in_(emails))))
+
+
+def test_bulk_add_respects_total_cap(admin_client):
+    # Giới hạn từng vai trò còn chỗ nhưng tổng số người (max_user_joined) thì không
+    event_id = create_event(max_instructor=3, max_teaching_assistant=3, max_user_joined=4)
+    instructors = user_ids(create_users("bulk-add-instructor", 3))
+    assistants = user_ids(create_users("bulk-add-ta", 2))
+    url = f"/events/partials/events/{event_id}/participants"
+
+    response = admin_client.post(url, data={"user_ids": instructors, "role": EventRole.INSTRUCTOR.value})
+    assert response.status_code == 200
+    assert "vượt quá giới hạn" not in response.text
+
+    response = admin_client.post(url, data={"user_ids": assistants, "role": EventRole.TA.value})
+    assert "vượt quá giới hạn (4)" in response.text
+
+    with database.SessionLocal() as db:
+        event = db.get(models.Event, event_id)
+        joined = db.scalar(select(func.count()).select_from(models.UserEvent).where(models.UserEvent.event_id == event_id))
+    assert (event.instructor_count, event.teaching_assistant_count, joined) == (3, 0, 3)
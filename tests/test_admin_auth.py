@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from tests.factories import auth_cookies, create_users
+
+# Mọi route dưới /api/admin phải chặn hẳn request không phải admin (không chỉ redirect)
+ADMIN_API_PATHS = [
+    "/api/admin/users",
+    "/api/admin/stats/auth-cache",
+    "/api/admin/stats/password-hashing",
+    "/api/admin/stats/dashboard",
+    "/api/admin/stats/event-stream",
+    "/api/admin/stats/events-table-cache",
+    "/api/admin/stats/user-search",
+    "/api/admin/stats/db-pool",
+    "/api/admin/stats/startup",
+    "/api/admin/stats/templates",
+    "/api/admin/stats/compression",
+]
+
+
+@pytest.mark.parametrize("path", ADMIN_API_PATHS)
+def test_admin_api_rejects_anonymous(app, path):
+    response = TestClient(app).get(path)
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("path", ADMIN_API_PATHS)
+def test_admin_api_rejects_non_admin(app, path):
+    [email] = create_users(f"not-admin{path.replace('/', '-')}", 1)
+    response = TestClient(app, cookies=auth_cookies(email)).get(path)
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("path", ADMIN_API_PATHS)
+def test_admin_api_allows_admin(admin_client, path):
+    assert admin_client.get(path).status_code == 200
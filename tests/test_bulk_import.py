@@ -0,0 +1,26 @@
+from sqlalchemy import select
+
+import database
+import models
+
+CSV = (
+    "email,full_name,phone,password\n"
+    "import-ok@gmail.com,Nguyễn Văn A,0911000001,matkhau123\n"
+    "import-blank@gmail.com,Trần Thị B,0911000002,\n"
+)
+
+
+def test_import_users_rejects_rows_without_password(admin_client):
+    response = admin_client.post(
+        "/api/admin/users/import", files={"file": ("users.csv", CSV.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    report = response.json()
+
+    # Không có mật khẩu mặc định chung: dòng để trống bị từ chối, không tạo tài khoản
+    assert report["created"] == 1
+    assert report["errors"] == [{"row": 3, "email": "import-blank@gmail.com", "message": "Thiếu mật khẩu"}]
+
+    with database.SessionLocal() as db:
+        emails = set(db.scalars(select(models.User.email).where(models.User.email.like("import-%"))))
+    assert emails == {"import-ok@gmail.com"}
@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+import database
+import models
+from helpers.capacity import reserve_seats
+from routers.pages.partials import time_bucket
+from schemas import EventRole
+from tests.factories import async_client, auth_cookies, create_event, create_users
+
+
+@contextmanager
+def count_queries():
+    statements = []
+    engines = (database.engine, database.async_engine.sync_engine)
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", listener)
+
+
+def data_version() -> int:
+    with database.engine.connect() as connection:
+        return connection.scalar(select(models.DataVersion.version).where(models.DataVersion.name == models.EVENTS_DATA))
+
+
+def test_events_table_revalidates_before_querying(app):
+    create_event()
+    [email] = create_users("etag-viewer", 1)
+    client = TestClient(app, cookies=auth_cookies(email))
+
+    first = client.get("/partials/events-table?tab=upcoming")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    # Chưa có gì đổi -> 304 chỉ với một câu tra data_versions (người dùng đã nằm trong cache xác thực)
+    with count_queries() as statements:
+        again = client.get("/partials/events-table?tab=upcoming", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert len(statements) == 1 and "data_versions" in statements[0]
+
+    # Một lần ghi ở bất kỳ đâu (ở đây: thẳng vào DB như một worker khác) -> ETag đổi
+    create_event()
+    changed = client.get("/partials/events-table?tab=upcoming", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_data_version_is_bumped_after_commit_only(app):
+    event_id = create_event(max_instructor=2)
+    before = data_version()
+
+    with database.SessionLocal() as db:
+        db.execute(reserve_seats(event_id, EventRole.INSTRUCTOR.value))
+        # Trong transaction chỉ đánh dấu: dòng data_versions không bị khóa/ghi trong lúc request đang ghi
+        assert data_version() == before
+        db.rollback()
+    assert data_version() == before
+
+    with database.SessionLocal() as db:
+        db.execute(reserve_seats(event_id, EventRole.INSTRUCTOR.value))
+        db.commit()
+    assert data_version() == before + 1
+
+
+def test_async_session_commit_bumps_data_version(app):
+    event_id = create_event()
+    [email] = create_users("etag-joiner", 1)
+    before = data_version()
+
+    async def join():
+        await database.async_engine.dispose()
+        async with async_client(app, email) as client:
+            return await client.post(f"/api/events/{event_id}/join/", data={"role": "ta"})
+
+    assert asyncio.run(join()).status_code == 200
+    assert data_version() == before + 1
+
+
+def test_time_bucket_changes_only_at_period_boundaries():
+    day = datetime(2030, 1, 2)
+    key = lambda h, m, s=0: time_bucket(day.replace(hour=h, minute=m, second=s))[0]
+
+    # Tiết 1: 7:00-7:30, tiết 2 bắt đầu 7:30. Đang diễn ra: start_at <= now; đã kết thúc: end_at < now
+    assert key(6, 59, 59) != key(7, 0)
+    assert key(7, 0) == key(7, 29, 59)
+    assert len({key(7, 29, 59), key(7, 30), key(7, 30, 1)}) == 3
+    assert key(7, 30, 1) == key(7, 59, 59)
+    assert time_bucket(day.replace(hour=7, minute=45))[1] == day.replace(hour=7, minute=30)
@@ -0,0 +1,45 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy import select
+
+import database
+import models
+from schemas import EventRole
+from tests.factories import async_client, create_event, create_users
+
+REQUESTS = 300
+
+
+def test_concurrent_joins_never_exceed_role_caps(app):
+    event_id = create_event(max_instructor=2, max_teaching_assistant=3, max_user_joined=5)
+    emails = create_users("join-race", REQUESTS)
+    roles = [EventRole.INSTRUCTOR.value if i % 2 else "ta" for i in range(REQUESTS)]
+
+    async def join(email: str, role: str) -> int:
+        async with async_client(app, email) as client:
+            response = await client.post(f"/api/events/{event_id}/join/", data={"role": role})
+            return response.status_code
+
+    async def run():
+        # Kết nối async còn trong pool được mở trên event loop của TestClient (test trước) -> bỏ đi, mở lại trên loop này
+        await database.async_engine.dispose()
+        return await asyncio.gather(*(join(email, role) for email, role in zip(emails, roles)))
+
+    statuses = Counter(asyncio.run(run()))
+
+    # Chỉ đúng số chỗ được cấp; mọi request còn lại bị từ chối sạch (400), không lỗi 500
+    assert statuses[200] == 2 + 3
+    assert statuses[400] == REQUESTS - 5
+    assert set(statuses) == {200, 400}
+
+    with database.SessionLocal() as db:
+        event = db.get(models.Event, event_id)
+        links = Counter(db.scalars(select(models.UserEvent.role).where(models.UserEvent.event_id == event_id)))
+
+    # Bộ đếm khớp đúng số dòng user_event và không vượt giới hạn của từng vai trò
+    assert event.instructor_count == links[EventRole.INSTRUCTOR.value] == 2
+    assert event.teaching_assistant_count == links[EventRole.TA.value] == 3
+    assert event.instructor_count <= event.max_instructor
+    assert event.teaching_assistant_count <= event.max_teaching_assistant
+    assert sum(links.values()) <= event.max_user_joined
@@ -0,0 +1,56 @@
+"""
+Ngân sách query của các route đọc nóng (header X-Query-Count, conftest bật QUERY_AUDIT=1).
+Số query không được tăng theo số sự kiện / người tham gia trong trang: N+1 sẽ làm vượt ngân sách
+và bị assert_query_budget báo ngay (câu SQL lặp lại).
+"""
+import pytest
+
+import database
+import models
+from helpers.fragment_cache import events_table_cache
+from helpers.query_audit import assert_query_budget
+from tests.factories import create_event, create_users
+
+EVENTS = 12
+PARTICIPANTS_PER_EVENT = 3
+
+
+@pytest.fixture(scope="module")
+def events_with_participants(admin_client):
+    emails = create_users("budget", EVENTS + PARTICIPANTS_PER_EVENT)
+    with database.SessionLocal() as db:
+        user_ids = [user.user_id for user in db.query(models.User).filter(models.User.email.in_(emails))]
+        for day in range(EVENTS):
+            event_id = create_event(days_from_now=day + 1, max_teaching_assistant=PARTICIPANTS_PER_EVENT,
+                                    max_user_joined=PARTICIPANTS_PER_EVENT + 1)
+            for user_id in user_ids[day:day + PARTICIPANTS_PER_EVENT]:
+                db.add(models.UserEvent(event_id=event_id, user_id=user_id, role="teaching_assistant"))
+        db.commit()
+
+
+def test_api_events_query_budget(admin_client, events_with_participants):
+    # data_version (ETag) + trang sự kiện + participants (selectinload) + user nếu cache xác thực chưa có
+    assert_query_budget(admin_client.get("/api/events"), 4)
+    assert_query_budget(admin_client.get("/api/events", params={"limit": 5}), 4)
+
+def test_events_table_partial_query_budget(admin_client, events_with_participants):
+    events_table_cache.bump()
+    # data_version + sự kiện của tab + participants + users của participants (selectinload lồng nhau)
+    response = admin_client.get("/partials/events-table", params={"tab": "upcoming"})
+    assert response.status_code == 200
+    assert_query_budget(response, 4)
+    # Trang đã cache: chỉ còn câu đọc data_version
+    assert_query_budget(admin_client.get("/partials/events-table", params={"tab": "upcoming"}), 1)
+
+def test_events_table_revalidation_query_budget(admin_client, events_with_participants):
+    etag = admin_client.get("/partials/events-table", params={"tab": "upcoming"}).headers["etag"]
+    response = admin_client.get("/partials/events-table", params={"tab": "upcoming"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert_query_budget(response, 1)
+
+def test_admin_users_query_budget(admin_client, events_with_participants):
+    # Keyset theo user_id: một câu cho cả trang, không lazy-load quan hệ nào
+    assert_query_budget(admin_client.get("/api/admin/users"), 2)
+    response = admin_client.get("/api/admin/users", params={"limit": 5})
+    assert_query_budget(response, 2)
+    assert_query_budget(admin_client.get("/api/admin/users", params={"limit": 5, "after": response.headers["x-next-cursor"]}), 2)
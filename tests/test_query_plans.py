@@ -0,0 +1,155 @@
+"""
+Các query nóng phải đi đúng index (tạo trong alembic d3a9f6b2c814 / models.py):
+- tab bảng sự kiện + trang kế tiếp (keyset) -> ix_events_active_start_at / ix_events_active_end_at
+- danh sách user (API admin, keyset theo user_id) -> ix_users_active_user_id
+- tìm user: Postgres -> ix_users_search_text_trgm; SQLite -> index trigram trong bộ nhớ rồi tra theo khóa chính
+
+SQLite chạy trên DB test. Postgres chỉ chạy khi đặt TEST_POSTGRES_URL (DB trống dành riêng cho test:
+bảng bị xóa và tạo lại).
+"""
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select, text
+
+import database
+import models
+from helpers.pagination import encode_cursor
+from helpers.user_search import ensure_search_index_sync, search_clauses, trigram_search_clauses
+from routers.pages.partials import apply_keyset, build_tab_query
+from tests.factories import create_event, create_users
+from utils.text_utils import build_user_search_text, fold_text
+from utils.time_utils import get_event_times, now_vn
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+TAB_INDEXES = {
+    "upcoming": "ix_events_active_start_at",
+    "ongoing": "ix_events_active_start_at",
+    "finished": "ix_events_active_end_at",
+}
+
+
+@contextmanager
+def explain(conn, prefix: str):
+    """Chạy câu SQL thật (đã qua compile + xử lý tham số của SQLAlchemy) dưới dạng EXPLAIN."""
+    def rewrite(conn, cursor, statement, parameters, context, executemany):
+        return prefix + statement, parameters
+
+    event.listen(conn, "before_cursor_execute", rewrite, retval=True)
+    try:
+        yield
+    finally:
+        event.remove(conn, "before_cursor_execute", rewrite)
+
+def query_plan(conn, stmt) -> str:
+    if conn.dialect.name == "postgresql":
+        with explain(conn, "EXPLAIN "):
+            return "\n".join(row[0] for row in conn.execute(stmt).fetchall())
+    with explain(conn, "EXPLAIN QUERY PLAN "):
+        return "\n".join(row[-1] for row in conn.execute(stmt).fetchall())
+
+
+def tab_page_queries(now):
+    """(tab, trang đầu, trang kế tiếp theo cursor) giống route /partials/events-table."""
+    for tab, index in TAB_INDEXES.items():
+        query, sort_col, descending = build_tab_query(tab, now)
+        first = apply_keyset(query, sort_col, descending, None).limit(51)
+        following = apply_keyset(query, sort_col, descending, encode_cursor(now, 10)).limit(51)
+        yield tab, index, first, following
+
+def users_page_query(after_user_id: int | None = None):
+    """Giống GET /api/admin/users."""
+    query = select(models.User).where(models.User.is_deleted == False).order_by(models.User.user_id)
+    if after_user_id is not None:
+        query = query.where(models.User.user_id > after_user_id)
+    return query.limit(101)
+
+
+@pytest.fixture(scope="module")
+def sqlite_data(app):
+    for days in (-3, -1, 0, 1, 5):
+        create_event(days_from_now=days)
+    create_users("plans", 20)
+
+
+@pytest.mark.parametrize("tab", list(TAB_INDEXES))
+def test_sqlite_tab_queries_use_active_event_indexes(sqlite_data, tab):
+    now = now_vn()
+    _, index, first, following = next(item for item in tab_page_queries(now) if item[0] == tab)
+    with database.engine.connect() as conn:
+        assert index in query_plan(conn, first)
+        assert index in query_plan(conn, following)
+
+def test_sqlite_users_keyset_uses_active_user_index(sqlite_data):
+    with database.engine.connect() as conn:
+        assert "ix_users_active_user_id" in query_plan(conn, users_page_query())
+        assert "ix_users_active_user_id" in query_plan(conn, users_page_query(after_user_id=5))
+
+def test_sqlite_search_looks_up_primary_key(sqlite_data):
+    # SQLite không có pg_trgm: index trigram trong bộ nhớ trả về user_id, SQL chỉ tra theo khóa chính
+    with database.SessionLocal() as db:
+        ensure_search_index_sync(db)
+    conditions, order_by = search_clauses("test plans")
+    assert "IN" in str(conditions[0]), "từ khóa phải khớp ít user để có câu tra theo khóa chính"
+    query = select(models.User).where(models.User.is_deleted == False, *conditions).order_by(*order_by).limit(100)
+    with database.engine.connect() as conn:
+        plan = query_plan(conn, query)
+    assert "PRIMARY KEY" in plan or "ix_users_active_user_id" in plan
+    assert "SCAN users\n" not in plan + "\n"
+
+
+@pytest.fixture(scope="module")
+def pg_conn():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("Đặt TEST_POSTGRES_URL để kiểm tra plan trên Postgres")
+    engine = create_engine(TEST_POSTGRES_URL)
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+
+    now = now_vn()
+    with engine.begin() as conn:
+        users = []
+        for i in range(2000):
+            email, full_name, phone = f"pg-{i}@test.local", f"Nguyễn Văn Test {i}", f"09{i:08d}"
+            users.append({
+                "email": email, "full_name": full_name, "phone": phone, "hashed_password": "x",
+                "status": True, "role": "user", "is_deleted": i % 50 == 0,
+                "search_text": build_user_search_text(full_name, email, phone),
+            })
+        conn.execute(insert(models.User), users)
+        events = []
+        for i in range(2000):
+            day = now.date() + timedelta(days=i % 200 - 100)
+            start_at, end_at = get_event_times(day, 1, 4)
+            events.append({
+                "name": f"E{i}", "day_start": day, "start_period": 1, "end_period": 4, "school_name": "S",
+                "max_user_joined": 3, "max_instructor": 1, "max_teaching_assistant": 2,
+                "status": "deleted" if i % 30 == 0 else "ongoing", "start_at": start_at, "end_at": end_at,
+            })
+        conn.execute(insert(models.Event), events)
+        conn.execute(text("ANALYZE"))
+
+    with engine.connect() as conn:
+        # Bảng test nhỏ: tắt seq scan để plan phản ánh index nào dùng được, không phụ thuộc kích thước bảng
+        conn.execute(text("SET enable_seqscan = off"))
+        yield conn
+    models.Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("tab", list(TAB_INDEXES))
+def test_postgres_tab_queries_use_active_event_indexes(pg_conn, tab):
+    _, index, first, following = next(item for item in tab_page_queries(now_vn()) if item[0] == tab)
+    assert index in query_plan(pg_conn, first)
+    assert index in query_plan(pg_conn, following)
+
+def test_postgres_users_keyset_uses_active_user_index(pg_conn):
+    assert "ix_users_active_user_id" in query_plan(pg_conn, users_page_query(after_user_id=5))
+
+def test_postgres_search_uses_trigram_index(pg_conn):
+    conditions, order_by = trigram_search_clauses(fold_text("Nguyễn Văn"))
+    query = select(models.User).where(models.User.is_deleted == False, *conditions).order_by(*order_by).limit(100)
+    assert "ix_users_search_text_trgm" in query_plan(pg_conn, query)
@@ -0,0 +1,60 @@
+from sqlalchemy import select
+
+import database
+import models
+from helpers.data_version import current_version
+from helpers.user_search import FALLBACK_MAX_IDS, ensure_search_index_sync, search_clauses, user_search_index
+from tests.factories import create_users
+
+
+def find(q: str) -> list[int]:
+    with database.SessionLocal() as db:
+        ensure_search_index_sync(db)
+        conditions, rank_order = search_clauses(q)
+        query = select(models.User.user_id).where(models.User.is_deleted == False, *conditions)
+        return db.scalars(query.order_by(*rank_order)).all()
+
+
+def add_user(full_name: str, email: str, phone: str) -> int:
+    with database.SessionLocal() as db:
+        user = models.User(full_name=full_name, email=email, phone=phone, hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user.user_id
+
+
+def test_search_ignores_accents_and_ranks_by_match_position():
+    word_start = add_user("Lý Khuê", "rank-b@husc.edu.vn", "0811000002")
+    text_start = add_user("Khuê Trần", "rank-a@husc.edu.vn", "0811000001")
+    mid_word = add_user("Trầnkhuê Lý", "rank-c@husc.edu.vn", "0811000003")
+
+    assert find("khue") == [text_start, word_start, mid_word]
+    assert find("KHUÊ") == [text_start, word_start, mid_word]
+
+
+def test_search_returns_every_match():
+    # Nhiều hơn ngưỡng của index -> chuyển sang LIKE nhưng vẫn đủ kết quả, phân trang trong SQL
+    emails = create_users("broad-match", FALLBACK_MAX_IDS + 50)
+    assert len(find("broad-match")) == len(emails)
+    assert len(find("broad-match-1")) == 1 + 10 + 100
+
+
+def test_index_follows_shared_users_version():
+    assert find("late-comer") == []
+    built_at = user_search_index.version
+
+    # Ghi từ session khác (như một worker khác): không ai gọi invalidate(), chỉ có data_versions đổi
+    create_users("late-comer", 1)
+    with database.SessionLocal() as db:
+        assert current_version(db, models.USERS_DATA)[0] > built_at
+    assert len(find("late-comer")) == 1
+    assert user_search_index.version > built_at
+
+
+def test_non_search_columns_do_not_rebuild_index():
+    user_id = add_user("Token Only", "token-only@husc.edu.vn", "0811000009")
+    with database.SessionLocal() as db:
+        before = current_version(db, models.USERS_DATA)[0]
+        db.get(models.User, user_id).token_version += 1
+        db.commit()
+        assert current_version(db, models.USERS_DATA)[0] == before
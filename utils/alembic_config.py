@@ -1,10 +1,79 @@
-from alembic.config import Config
-from alembic import command
+import asyncio
+import logging
+import os
+import time
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from helpers.password_pool import password_pool
+from helpers.event_broadcast import event_broadcaster
+from helpers import templating
+from utils import preload
+from utils.migrate import ensure_schema_at_head
+
+# Migration KHÔNG chạy trong worker nữa: chạy `python -m utils.migrate` một lần trước khi khởi động gunicorn.
+# Worker chỉ kiểm tra alembic_version đã ở head chưa (dưới advisory lock chia sẻ) rồi mới nhận request.
+
+# Logger của uvicorn đã được cấu hình mức INFO -> thời gian khởi động hiện ra trong log worker
+logger = logging.getLogger("uvicorn.error")
+
+
+class StartupTimings:
+    """Thời gian từng giai đoạn khởi động của worker này (giây), xem ở /api/admin/stats/startup."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.ready_memory: dict = {}
+
+    def record(self, name: str, started: float):
+        self.phases[name] = time.perf_counter() - started
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def mark_ready(self):
+        if preload.forked_at is not None:
+            # Preload: import_app đã làm một lần trong master, worker chỉ tốn từ lúc fork tới khi sẵn sàng
+            self.record("fork_to_ready", preload.forked_at)
+        self.ready_memory = preload.memory_usage()
+
+    def stats(self) -> dict:
+        phases_ms = {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}
+        preloaded = "fork_to_ready" in phases_ms
+        return {
+            "pid": os.getpid(),
+            "preloaded": preloaded,
+            "phases_ms": phases_ms,
+            "total_ms": phases_ms["fork_to_ready"] if preloaded else round(sum(self.phases.values()) * 1000, 1),
+            "memory_at_ready": self.ready_memory,
+            "memory_now": preload.memory_usage(),
+        }
+
+
+startup_timings = StartupTimings()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    alembic_cfg = Config("alembic.ini")
-    command.upgrade(alembic_cfg, "head")
-    yield
\ No newline at end of file
+    with startup_timings.phase("schema_check"):
+        await asyncio.to_thread(ensure_schema_at_head)
+    with startup_timings.phase("templates"):
+        # Preload: master đã biên dịch sẵn -> chỉ còn tra cache
+        templating.precompile()
+    with startup_timings.phase("event_broadcaster"):
+        await event_broadcaster.start()
+    startup_timings.mark_ready()
+    summary = startup_timings.stats()
+    logger.info(
+        "Worker %d sẵn sàng sau %.1f ms (%s), bộ nhớ %s",
+        summary["pid"], summary["total_ms"],
+        ", ".join(f"{name}={ms} ms" for name, ms in summary["phases_ms"].items()),
+        summary["memory_at_ready"],
+    )
+    yield
+    await event_broadcaster.stop()
+    password_pool.shutdown()
@@ -0,0 +1,96 @@
+"""
+Build static/ -> STATIC_BUILD_DIR (mặc định static_build/) cho helpers/static_assets.py:
+
+    python -m utils.build_assets
+
+- Mỗi file được copy giữ nguyên tên (để các đường dẫn tương đối trong CSS như fonts/..., *.map vẫn đúng)
+  và thêm một bản có vân tay nội dung: css/x.min.css -> css/x.min.<hash>.css.
+- File dạng text (css, js, svg, map...) đủ lớn được nén sẵn thành .br và .gz bên cạnh.
+- manifest.json ghi ánh xạ tên gốc -> tên có vân tay và các bản nén có sẵn.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+import brotli
+from helpers.static_assets import MANIFEST_NAME, STATIC_BUILD_DIR, STATIC_DIR
+
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".map", ".svg", ".json", ".html", ".txt", ".xml", ".ico", ".ttf", ".eot"}
+# File nhỏ hơn thì nén không đáng (header + overhead của một file nữa)
+MIN_COMPRESS_BYTES = 1024
+# Chỉ giữ bản nén khi nhỏ hơn bản gốc ít nhất 10%
+MAX_COMPRESS_RATIO = 0.9
+HASH_LENGTH = 10
+
+
+def fingerprinted_name(rel_path: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    path = Path(rel_path)
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def compress(content: bytes) -> dict[str, bytes]:
+    variants = {
+        "br": brotli.compress(content, quality=11),
+        # mtime=0: build lại cùng nội dung cho ra đúng cùng file
+        "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+    }
+    return {name: data for name, data in variants.items() if len(data) <= len(content) * MAX_COMPRESS_RATIO}
+
+
+def build(source: Path = STATIC_DIR, output: Path = STATIC_BUILD_DIR) -> dict:
+    started = time.perf_counter()
+    if output.exists():
+        shutil.rmtree(output)
+    files: dict[str, str] = {}
+    encodings: dict[str, list[str]] = {}
+    totals = {"files": 0, "bytes": 0, "br_bytes": 0, "gzip_bytes": 0, "compressed_files": 0}
+
+    for path in sorted(source.rglob("*")):
+        if not path.is_file():
+            continue
+        rel_path = path.relative_to(source).as_posix()
+        content = path.read_bytes()
+        hashed_path = fingerprinted_name(rel_path, content)
+        files[rel_path] = hashed_path
+
+        variants = {}
+        if path.suffix.lower() in COMPRESSIBLE_SUFFIXES and len(content) >= MIN_COMPRESS_BYTES:
+            variants = compress(content)
+
+        for name in (rel_path, hashed_path):
+            target = output / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            for encoding, data in variants.items():
+                target.with_name(target.name + (".br" if encoding == "br" else ".gz")).write_bytes(data)
+            if variants:
+                encodings[name] = sorted(variants)
+
+        totals["files"] += 1
+        totals["bytes"] += len(content)
+        if variants:
+            totals["compressed_files"] += 1
+        # Byte thực sự gửi đi khi client nhận kiểu nén đó (file không nén được tính nguyên kích thước)
+        totals["br_bytes"] += len(variants.get("br", content))
+        totals["gzip_bytes"] += len(variants.get("gzip", content))
+
+    with open(output / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump({"files": files, "encodings": encodings}, f, ensure_ascii=False, indent=1, sort_keys=True)
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vân tay + nén sẵn file tĩnh")
+    parser.add_argument("--source", type=Path, default=STATIC_DIR)
+    parser.add_argument("--output", type=Path, default=STATIC_BUILD_DIR)
+    args = parser.parse_args()
+    print(build(args.source, args.output))
+
+
+if __name__ == "__main__":
+    main()
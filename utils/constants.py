@@ -32,4 +32,8 @@ PERIOD_END_TIMES = {
     21: (18, 30), 22: (19, 0),
     23: (19, 30), 24: (20, 0),
     25: (20, 30), 26: (21, 0),
-}
\ No newline at end of file
+}
+
+# Tiết không có trong bảng trên: bắt đầu 7:00, kết thúc cuối ngày (23:59) -> sự kiện không bị coi là đã kết thúc sớm
+DEFAULT_START_TIME = (7, 0)
+DEFAULT_END_TIME = (23, 59)
@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+import time
+from uuid import uuid4
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+# Cấu hình pool kết nối DB qua env. Mỗi worker gunicorn có pool riêng (sync + async),
+# nên tổng kết nối tới DB tối đa = số worker x 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+# DB_POOL_MODE=null: không giữ kết nối (mượn/trả ngay) - dùng khi đứng sau PgBouncer (transaction pooling).
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Số giây chờ mượn kết nối khi pool đã cạn trước khi báo lỗi
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Đóng và mở lại kết nối đã sống quá N giây (tránh bị firewall/DB cắt ngầm); -1 = không giới hạn
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Chờ mượn kết nối lâu hơn ngưỡng này (ms) thì ghi log cảnh báo
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", 100))
+
+
+class PoolMetrics:
+    """Đếm số lần mượn kết nối, thời gian chờ và số lần hết hạn chờ của một pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            # Dưới 1ms coi như lấy được ngay từ pool, không tính là phải chờ
+            if wait >= 0.001:
+                self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waited,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / total * 1000, 3) if total else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _MeasuredCheckout:
+    """Mixin cho QueuePool: đo thời gian chờ mỗi lần mượn kết nối (_do_get chỉ chặn khi pool đã cạn)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            logger.warning("Hết kết nối DB sau %gs chờ: %s", self._timeout, self.status())
+            raise
+        wait = time.perf_counter() - start
+        self.metrics.record(wait)
+        if wait * 1000 >= DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning("Chờ kết nối DB %.0fms: %s", wait * 1000, self.status())
+        return conn
+
+    def recreate(self):
+        # Pool mới (vd. sau dispose()) vẫn giữ số liệu cũ để không mất lịch sử
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeasuredQueuePool(_MeasuredCheckout, QueuePool):
+    pass
+
+
+class MeasuredAsyncQueuePool(_MeasuredCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool) -> dict:
+    """Tham số pool cho create_engine / create_async_engine theo env."""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if ":memory:" in url or url.endswith("sqlite://"):
+        # SQLite in-memory: mỗi kết nối là một DB riêng -> giữ pool mặc định của SQLAlchemy
+        return options
+
+    if DB_POOL_MODE == "null":
+        options["poolclass"] = NullPool
+        if url.startswith("postgresql+asyncpg"):
+            # PgBouncer (transaction pooling) không giữ prepared statement giữa các transaction:
+            # tắt cache statement và đặt tên statement ngẫu nhiên để không đụng tên giữa các kết nối
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    options.update(
+        poolclass=MeasuredAsyncQueuePool if is_async else MeasuredQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # Số kết nối đang mở vượt pool_size (âm = pool chưa mở đủ pool_size kết nối)
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
@@ -0,0 +1,120 @@
+"""
+Chạy migration MỘT lần trước khi khởi động các worker:
+
+    python -m utils.migrate          # DB trống: tạo bảng + stamp head; DB cũ: alembic upgrade head
+    python -m utils.migrate --check  # chỉ kiểm tra schema đã ở head chưa (exit code 1 nếu chưa)
+
+Worker chỉ kiểm tra nhanh revision hiện tại (ensure_schema_at_head) chứ không tự chạy DDL.
+Trên Postgres mọi bước đều giữ advisory lock: migrate giữ lock độc quyền, worker giữ lock chia sẻ
+-> worker không đọc revision giữa chừng và nhiều lần migrate chạy cùng lúc sẽ lần lượt, không đè DDL lên nhau.
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+import database
+import models
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Khóa advisory dùng chung cho mọi tiến trình migrate/kiểm tra schema (số bất kỳ, cố định)
+MIGRATION_LOCK_ID = 72_410_020
+# Worker tự chạy migration khi schema chưa ở head (chỉ nên bật khi dev một process)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+
+class SchemaNotAtHead(RuntimeError):
+    pass
+
+
+def alembic_config() -> Config:
+    return Config(str(BASE_DIR / "alembic.ini"))
+
+def head_revisions(cfg: Config) -> set[str]:
+    return set(ScriptDirectory.from_config(cfg).get_heads())
+
+def current_revisions(conn) -> set[str]:
+    return set(MigrationContext.configure(conn).get_current_heads())
+
+
+@contextmanager
+def migration_lock(conn, shared: bool = False):
+    """pg_advisory_lock theo phiên; SQLite không cần (ghi vào file DB vốn đã tuần tự)."""
+    if conn.dialect.name != "postgresql":
+        yield
+        return
+    suffix = "_shared" if shared else ""
+    conn.execute(text(f"SELECT pg_advisory_lock{suffix}(:id)"), {"id": MIGRATION_LOCK_ID})
+    conn.commit()
+    try:
+        yield
+    finally:
+        conn.execute(text(f"SELECT pg_advisory_unlock{suffix}(:id)"), {"id": MIGRATION_LOCK_ID})
+        conn.commit()
+
+
+def migrate() -> str:
+    """Đưa schema lên head. Trả về việc đã làm: bootstrap / upgrade / up-to-date."""
+    cfg = alembic_config()
+    with database.engine.connect() as conn, migration_lock(conn):
+        # Kiểm tra lại sau khi có lock: tiến trình khác có thể vừa migrate xong
+        if current_revisions(conn) == head_revisions(cfg):
+            return "up-to-date"
+        # Chạy migration trên chính kết nối đang giữ lock (alembic/env.py dùng connection này)
+        cfg.attributes["connection"] = conn
+        if not inspect(conn).has_table("users"):
+            # Revision đầu tiên giả định bảng đã có sẵn -> DB mới thì tạo theo model rồi đánh dấu head
+            models.Base.metadata.create_all(bind=conn)
+            conn.commit()
+            command.stamp(cfg, "head")
+            conn.commit()
+            return "bootstrap"
+        command.upgrade(cfg, "head")
+        conn.commit()
+        return "upgrade"
+
+
+def ensure_schema_at_head():
+    """Gọi lúc worker khởi động: chỉ đọc alembic_version (vài ms), không chạy DDL trừ khi bật AUTO_MIGRATE."""
+    cfg = alembic_config()
+    heads = head_revisions(cfg)
+    with database.engine.connect() as conn, migration_lock(conn, shared=True):
+        current = current_revisions(conn)
+    if current == heads:
+        return
+    if AUTO_MIGRATE:
+        migrate()
+        return
+    raise SchemaNotAtHead(
+        f"Schema DB đang ở {sorted(current) or 'trống'}, cần {sorted(heads)}: "
+        "chạy `python -m utils.migrate` trước khi khởi động app (hoặc đặt AUTO_MIGRATE=1 khi dev)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration schema DB (chạy một lần trước khi khởi động worker)")
+    parser.add_argument("--check", action="store_true", help="Chỉ kiểm tra schema đã ở head chưa")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.check:
+        try:
+            ensure_schema_at_head()
+        except SchemaNotAtHead as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print(f"schema at head ({time.perf_counter() - started:.2f}s)")
+        return
+
+    result = migrate()
+    print(f"migrate: {result} ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import gc
+import os
+import time
+
+# Chế độ preload của gunicorn (xem gunicorn.conf.py): master import app MỘT lần rồi fork ra các worker.
+# Phần bộ nhớ đã nạp trong master (module, route, OpenAPI schema, template đã biên dịch) được chia sẻ
+# copy-on-write giữa các worker thay vì mỗi worker giữ một bản riêng.
+# - Master: gc.disable() sớm, gc.freeze() ngay trước fork -> GC trong worker không chạm vào (và làm bẩn)
+#   các trang nhớ của object cũ từ master.
+# - Worker: bật lại GC, bỏ các kết nối DB thừa hưởng từ master (socket không được dùng chung giữa process).
+# Module này không import gì nặng để gunicorn.conf.py nạp nhanh.
+
+PRELOAD_ENABLED = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+# Lúc fork (theo đồng hồ perf_counter, được copy sang worker) -> đo thời gian khởi động của riêng worker
+forked_at: float | None = None
+
+
+def warm_up(app) -> dict:
+    """Làm trước trong master những việc worker nào cũng làm ở request đầu tiên."""
+    from helpers import templating
+    started = time.perf_counter()
+    app.openapi()
+    compiled = templating.precompile()["templates"]
+    return {"templates": compiled, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def freeze_before_fork():
+    # Gọi lặp lại mỗi lần fork (kể cả khi gunicorn thay worker chết) là an toàn: object mới chuyển vào vùng permanent
+    gc.freeze()
+
+
+def after_fork():
+    """Chạy trong worker ngay sau fork, trước khi nhận request."""
+    global forked_at
+    forked_at = time.perf_counter()
+    gc.enable()
+    import database
+    # close=False: không đóng socket đang thuộc về master, chỉ bỏ pool cũ để worker tự mở kết nối mới
+    database.engine.dispose(close=False)
+    database.async_engine.sync_engine.dispose(close=False)
+
+
+def memory_usage() -> dict:
+    """RSS của process hiện tại (MB). PSS chia đều trang nhớ dùng chung -> cộng PSS các worker = RAM thực dùng."""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        # Không phải Linux (dev trên macOS/Windows): bỏ qua
+        return {}
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "rss_mb": mb(fields.get("Rss", 0)),
+        "pss_mb": mb(fields.get("Pss", 0)),
+        "shared_mb": mb(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+        "private_mb": mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+    }
@@ -0,0 +1,17 @@
+import re
+import unicodedata
+
+_SPACES = re.compile(r"\s+")
+
+def fold_text(value: str | None) -> str:
+    """Bỏ dấu tiếng Việt + chữ thường + gộp khoảng trắng: 'Nguyễn  Văn Đức' -> 'nguyen van duc'."""
+    if not value:
+        return ""
+    value = value.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SPACES.sub(" ", stripped).strip().lower()
+
+def build_user_search_text(full_name: str | None, email: str | None, phone: str | None) -> str:
+    """Chuỗi tìm kiếm của user (cột users.search_text)."""
+    return " ".join(part for part in (fold_text(full_name), fold_text(email), fold_text(phone)) if part)
@@ -0,0 +1,17 @@
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+from utils.constants import PERIOD_START_TIMES, PERIOD_END_TIMES, DEFAULT_START_TIME, DEFAULT_END_TIME
+
+VN_TZ = ZoneInfo("Asia/Ho_Chi_Minh")
+
+def now_vn() -> datetime:
+    """Giờ hiện tại theo múi giờ Việt Nam (naive, giống dữ liệu lưu trong DB)."""
+    return datetime.now(VN_TZ).replace(tzinfo=None)
+
+def get_event_times(event_day: date, start_period: int, end_period: int):
+    """Tính thời gian bắt đầu và kết thúc tuyệt đối của sự kiện từ ngày + tiết học."""
+    sh, sm = PERIOD_START_TIMES.get(start_period, DEFAULT_START_TIME)
+    eh, em = PERIOD_END_TIMES.get(end_period, DEFAULT_END_TIME)
+    start_dt = datetime.combine(event_day, time(sh, sm))
+    end_dt = datetime.combine(event_day, time(eh, em))
+    return start_dt, end_dt